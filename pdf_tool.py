@@ -2,6 +2,7 @@
 import tkinter as tk
 from tkinter import messagebox, filedialog
 import subprocess
+import threading
 import os
 import webbrowser
 import sys
@@ -66,9 +67,12 @@ def open_input():
             messagebox.showerror(lang["error"], f"{lang['web_fail']}\n{e}")
     elif os.path.isfile(input_text) and input_text.lower().endswith('.pdf'):
         try:
-            subprocess.run(['xdg-open', input_text], check=True)
+            # 不等待 xdg-open 結束，避免介面卡住；由背景線程回收子程序，不留下殭屍程序
+            proc = subprocess.Popen(['xdg-open', input_text], start_new_session=True,
+                                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            threading.Thread(target=proc.wait, daemon=True).start()
             log_opened_file(input_text)
-        except subprocess.CalledProcessError:
+        except OSError:
             messagebox.showerror(lang["error"], lang["open_fail"])
     else:
         messagebox.showerror(lang["error"], lang["invalid"])
@@ -1,7 +1,101 @@
 import csv
-from io import StringIO
-from typing import List, Dict, Any
-from datetime import datetime
+import gzip
+import os
+import re
+import tempfile
+from dataclasses import dataclass
+from itertools import islice
+from operator import itemgetter
+from typing import List, Dict, Any, Iterable, Iterator, Tuple
+from datetime import date, datetime
+
+# CSV 標題 (對應 FineBI 欄位)
+CSV_HEADERS = ['日期', '設備名稱', 'IP地址', '執行腳本', '運行時數(小時)', '在線時數(小時)', '離線時數(小時)']
+
+# CSV 換行字元 (FineBI / Excel 皆可讀取 LF，比 CRLF 每列少 1 byte)
+CSV_LINE_TERMINATOR = '\n'
+
+# 秒 -> 小時 換算係數 (以乘法取代逐列除法)
+_INV_3600 = 1.0 / 3600.0
+
+# 直接寫檔時使用的緩衝區大小 (1 MiB)
+FILE_BUFFER_SIZE = 1 << 20
+
+# generate_csv_file 暫存檔保留在記憶體的上限，超過即自動轉存磁碟 (64 MiB)
+SPOOL_MAX_SIZE = 64 * 1024 * 1024
+
+# Oracle executemany 每批筆數 (避免 DPI-1015 array size too large)
+ORACLE_BATCH_SIZE = 10_000
+
+# 資料表見 pi.sql 的 DEVICE_DAILY_STATS；不加 APPEND_VALUES 提示：direct-path 寫入不支援 batcherrors (ORA-38910)
+ORACLE_INSERT_SQL = ("INSERT INTO DEVICE_DAILY_STATS (RECORD_DATE, DEVICE_NAME, IP_ADDRESS, SCRIPT_PATH, "
+                     "RUNNING_HOURS, ONLINE_HOURS, OFFLINE_HOURS) VALUES (:1, :2, :3, :4, :5, :6, :7)")
+
+# DEVICE_DAILY_STATS 字串欄位長度 (DEVICE_NAME, IP_ADDRESS, SCRIPT_PATH)，供 setinputsizes 使用
+ORACLE_VARCHAR_SIZES = (50, 20, 255)
+
+
+def _chunks(iterable: Iterable, size: int) -> Iterator[list]:
+    """將可迭代物件切成固定大小的批次"""
+    it = iter(iterable)
+    return iter(lambda: list(islice(it, size)), [])
+
+
+# 判斷字串欄位是否需要依 CSV 規則加上引號 (含逗號、引號或換行)
+_need_quote = re.compile(r'[",\r\n]').search
+
+
+def _q(value: str) -> str:
+    """CSV 欄位引號處理 (同 csv.QUOTE_MINIMAL，另對 \\r 一律加引號以策安全)"""
+    if _need_quote(value) is None:
+        return value
+    return '"' + value.replace('"', '""') + '"'
+
+
+@dataclass
+class _ExportContext:
+    """單次匯出共用的資料 (CSV 與 Oracle 寫入共用)"""
+    days: Iterable[Tuple[str, Dict[str, Dict[str, float]]]]    # 依輸出順序的 (日期, 當日數據)
+    name_to_ip: Dict[str, str]
+    name_to_script: Dict[str, str]
+    name_to_csv: Dict[str, str]     # 設備名稱 -> 已加引號的 ",名稱,IP,腳本" CSV 片段
+
+
+class _Echo:
+    """偽檔案物件：csv.writer 寫入時直接回傳格式化後的字串，供逐列串流使用"""
+    def write(self, value: str) -> str:
+        return value
+
+
+# CSV 標題列 (不含 BOM)
+_CSV_HEADER_LINE = csv.writer(
+    _Echo(), lineterminator=CSV_LINE_TERMINATOR, quoting=csv.QUOTE_MINIMAL
+).writerow(CSV_HEADERS)
+
+
+def _write_oracle_batch(cursor, batch: List[Tuple[Any, ...]], first_offset: int) -> int:
+    """
+    以 executemany 寫入一批資料並 commit (每批提交，失敗的列不影響已寫入的批次)
+    :param first_offset: 此批第一筆在整體資料中的位置，用於錯誤回報
+    :return: 成功寫入的筆數
+    """
+    # RECORD_DATE 為 DATE 欄位，日期字串轉為 datetime.date 綁定 (同一天只轉換一次)
+    days = {}
+    binds = []
+    for row in batch:
+        day = days.get(row[0])
+        if day is None:
+            day = days[row[0]] = date.fromisoformat(row[0])
+        binds.append((day,) + row[1:])
+    
+    # batcherrors: 個別失敗的列不會中斷整批，事後逐筆回報
+    cursor.executemany(ORACLE_INSERT_SQL, binds, batcherrors=True, arraydmlrowcounts=True)
+    written = sum(cursor.getarraydmlrowcounts())
+    for error in cursor.getbatcherrors():
+        print(f"⚠️  第 {first_offset + error.offset + 1} 筆寫入失敗: {error.message}")
+    cursor.connection.commit()
+    return written
+
 
 class DataExporter:
     """
@@ -9,86 +103,249 @@ class DataExporter:
     負責生成報表 (CSV) 及寫入 Oracle 19c 數據庫
     """
     
-    def __init__(self, db_config: Dict[str, str] = None):
+    def __init__(self, db_config: Dict[str, str] = None, sort_dates: bool = True):
         """
         初始化匯出器
         :param db_config: Oracle 資料庫連線設定 (預留)
+        :param sort_dates: CSV 是否依日期新到舊排序 (False 則依記錄儲存順序輸出)
         """
         self.db_config = db_config
+        self.sort_dates = sort_dates
+        # 設備查找表快取 (依設備設定版本失效)
+        self._lookup_version = None
+        self._name_to_ip = {}
+        self._name_to_script = {}
+        self._name_to_csv = {}
 
-    def _get_daily_rows(self, devices: List[Dict], time_tracker) -> List[List[Any]]:
+    def _build_context(self, devices: List[Dict], time_tracker, sort_dates: bool = None) -> _ExportContext:
         """
-        獲取每日明細數據，供 CSV 和 Database 使用 (FineBI 格式)
+        建立匯出所需的共用資料
+        設備查找表在設備設定不變時重複使用，不必每次匯出重建
+        :param sort_dates: 是否依日期新到舊排序，None 表示使用建構時的設定
         """
-        rows = []
-        # 獲取所有歷史每日數據
+        if sort_dates is None:
+            sort_dates = self.sort_dates
+        
+        # 每日數據每次都重新取得，確保時數為最新
         daily_records = time_tracker.get_all_daily_records()
         
-        # 建立設備資訊查找表 (用名稱找 IP/Script)
-        device_map = {d['name']: d for d in devices}
+        # 直接走訪 (日期, 當日數據)，省去逐日再以日期查表
+        if sort_dates:
+            # 排序日期 (新到舊)；記錄依時間順序寫入，反向排序幾乎為線性時間
+            days = sorted(daily_records.items(), key=itemgetter(0), reverse=True)
+        else:
+            # 不需排序時直接依儲存順序輸出
+            days = daily_records.items()
         
-        # 排序日期 (新到舊)
-        sorted_dates = sorted(daily_records.keys(), reverse=True)
+        # 設備設定版本 (重新載入設定時遞增)，版本不變即沿用既有查找表
+        version = (getattr(time_tracker, 'devices_version', None), id(devices), len(devices))
+        if version != self._lookup_version:
+            # 建立設備資訊查找表 (用名稱找 IP/Script)，拆成兩張扁平表減少巢狀查找
+            self._name_to_ip = {d['name']: d.get('ip', 'N/A') for d in devices}
+            self._name_to_script = {d['name']: d.get('script_path', 'N/A') for d in devices}
+            # 每台設備的 CSV 維度欄位只需處理一次引號，之後每列直接拼接
+            self._name_to_csv = {
+                name: f",{_q(name)},{_q(ip)},{_q(self._name_to_script[name])}"
+                for name, ip in self._name_to_ip.items()
+            }
+            self._lookup_version = version
         
-        for date_str in sorted_dates:
-            day_data = daily_records[date_str]
+        return _ExportContext(
+            days=days,
+            name_to_ip=self._name_to_ip,
+            name_to_script=self._name_to_script,
+            name_to_csv=self._name_to_csv
+        )
+
+    def _iter_daily_rows(self, ctx: _ExportContext, as_text: bool = False) -> Iterator[Tuple[Any, ...]]:
+        """
+        逐列產生每日明細數據，供 CSV 和 Database 使用 (FineBI 格式)
+        以 generator 方式輸出，避免一次建立完整的列清單
+        :param as_text: 時數欄位輸出為已格式化字串 (CSV 用)；資料庫寫入維持 float
+        """
+        # 熱迴圈內使用的函式先綁定為區域變數，減少全域/屬性查找
+        _round = round
+        _inv = _INV_3600
+        ip_get = ctx.name_to_ip.get
+        script_get = ctx.name_to_script.get
+        
+        for date_str, day_data in ctx.days:
             for device_name, stats in day_data.items():
-                device_info = device_map.get(device_name, {})
+                stats_get = stats.get
                 
                 # 將秒數轉換為小時 (保留2位小數)，方便 BI 加總
-                run_h = round(stats.get('running', 0) / 3600, 2)
-                online_h = round(stats.get('online', 0) / 3600, 2)
-                offline_h = round(stats.get('offline', 0) / 3600, 2)
+                if as_text:
+                    # 一次完成四捨五入與字串轉換，省去 round() 及之後的 str()
+                    run_h = f"{stats_get('running', 0) * _inv:.2f}"
+                    online_h = f"{stats_get('online', 0) * _inv:.2f}"
+                    offline_h = f"{stats_get('offline', 0) * _inv:.2f}"
+                else:
+                    run_h = _round(stats_get('running', 0) * _inv, 2)
+                    online_h = _round(stats_get('online', 0) * _inv, 2)
+                    offline_h = _round(stats_get('offline', 0) * _inv, 2)
                 
-                row = [
+                yield (
                     date_str,                           # 1. 日期 (維度)
                     device_name,                        # 2. 設備名稱 (維度)
-                    device_info.get('ip', 'N/A'),       # 3. IP地址 (維度)
-                    device_info.get('script_path', 'N/A'), # 4. 執行腳本 (維度)
+                    ip_get(device_name, 'N/A'),         # 3. IP地址 (維度)
+                    script_get(device_name, 'N/A'),     # 4. 執行腳本 (維度)
                     run_h,                              # 5. 運行時數-小時 (指標)
                     online_h,                           # 6. 在線時數-小時 (指標)
                     offline_h                           # 7. 離線時數-小時 (指標)
-                ]
-                rows.append(row)
-        return rows
+                )
+
+    def _iter_csv_lines(self, ctx: _ExportContext, bom: bool = True, rows: Iterable = None) -> Iterator[str]:
+        """
+        依匯出內容逐列產生 CSV 文字 (含標題列，預設加上 BOM)
+        :param rows: 已取得的 float 資料列 (例如同時寫入 Oracle 的列)；None 則直接產生已格式化的文字列
+        """
+        # 寫入 BOM 以防止 Excel 開啟時中文亂碼
+        yield ('\ufeff' if bom else '') + _CSV_HEADER_LINE
+        
+        if rows is None:
+            rows = self._iter_daily_rows(ctx, as_text=True)
+        else:
+            rows = ((d, n, ip, s, f"{r:.2f}", f"{o:.2f}", f"{f:.2f}") for d, n, ip, s, r, o, f in rows)
+        
+        # 資料列直接以 f-string 組合，設備維度欄位使用預先處理好引號的片段，省去 csv.writer 的逐欄處理
+        q = _q
+        nl = CSV_LINE_TERMINATOR
+        fragment_get = ctx.name_to_csv.get
+        # 記錄中有但設定檔已無的設備：片段只存於本次匯出，不寫回跨匯出共用的查找表快取
+        unknown = {}
+        for date_str, device_name, ip, script, run_h, online_h, offline_h in rows:
+            fragment = fragment_get(device_name)
+            if fragment is None:
+                fragment = unknown.get(device_name)
+                if fragment is None:
+                    fragment = unknown[device_name] = f",{q(device_name)},{q(ip)},{q(script)}"
+            yield f"{date_str}{fragment},{run_h},{online_h},{offline_h}{nl}"
+
+    def iter_csv(self, devices: List[Dict], time_tracker) -> Iterator[str]:
+        """
+        逐列產生 CSV 內容 (串流輸出，不在記憶體中緩存整份報表)
+        可直接交給 Flask Response 作為串流回應
+        """
+        return self._iter_csv_lines(self._build_context(devices, time_tracker))
 
     def generate_csv(self, devices: List[Dict], time_tracker) -> str:
-        """生成 CSV 內容"""
-        si = StringIO()
-        si.write('\ufeff')  # 寫入 BOM 以防止 Excel 開啟時中文亂碼
-        cw = csv.writer(si)
+        """生成 CSV 內容 (保留相容性，內部使用 iter_csv)"""
+        return ''.join(self.iter_csv(devices, time_tracker))
+
+    def generate_csv_bytes(self, devices: List[Dict], time_tracker) -> bytes:
+        """
+        生成 UTF-8 編碼 (含 BOM) 的 CSV 內容
+        直接累加到 bytearray，省去 StringIO 的 getvalue 複製與之後的再次編碼
+        (bytearray 以幾何倍數擴充容量，逐列累加為攤銷 O(1)，不需預先配置大小)
+        """
+        buf = bytearray()
+        for line in self.iter_csv(devices, time_tracker):
+            buf += line.encode('utf-8')
+        return bytes(buf)
+
+    def export_all(self, csv_out, devices: List[Dict], time_tracker,
+                   oracle_cursor=None, batch_size: int = ORACLE_BATCH_SIZE) -> int:
+        """
+        只走訪一次每日明細，同時寫出 CSV 並分批寫入 Oracle (保留相容性，內部使用 write_csv_to)
+        :param csv_out: 檔案路徑，或具有 write(str) 的檔案物件 (需以 newline='' 開啟)
+        :param oracle_cursor: 已開啟的 Oracle cursor，None 則只輸出 CSV；每批寫入後會 commit
+        :return: 輸出的資料筆數
+        """
+        return self.write_csv_to(csv_out, devices, time_tracker,
+                                 oracle_cursor=oracle_cursor, batch_size=batch_size)
+
+    def generate_csv_file(self, devices: List[Dict], time_tracker):
+        """
+        生成 CSV 至暫存檔並回傳 (已移至開頭) 的檔案物件
+        小報表保留在記憶體，超過 SPOOL_MAX_SIZE 自動轉存磁碟，避免大量資料造成記憶體不足
+        呼叫端負責關閉回傳的檔案物件
+        """
+        f = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE, mode='w+', newline='', encoding='utf-8')
+        self.write_csv_to(f, devices, time_tracker)
+        f.seek(0)
+        return f
+
+    def write_csv_to(self, out, devices: List[Dict], time_tracker, compress: bool = False,
+                     oracle_cursor=None, batch_size: int = ORACLE_BATCH_SIZE) -> int:
+        """
+        將 CSV 逐列直接寫入檔案或已開啟的串流，不在記憶體中組出整份報表
+        :param out: 檔案路徑，或具有 write(str) 的檔案物件 (需以 newline='' 開啟)
+        :param compress: 以 gzip (level 1) 即時壓縮，此時 out 需為二進位串流，且不寫入 BOM
+        :param oracle_cursor: 已開啟的 Oracle cursor，同一次走訪的資料列同時分批寫入 (每批 commit)；None 則只輸出 CSV
+        :return: 輸出的資料筆數
+        """
+        if isinstance(out, (str, os.PathLike)):
+            if compress:
+                with open(out, 'wb', buffering=FILE_BUFFER_SIZE) as f:
+                    return self.write_csv_to(f, devices, time_tracker, True, oracle_cursor, batch_size)
+            with open(out, 'w', encoding='utf-8', newline='', buffering=FILE_BUFFER_SIZE) as f:
+                return self.write_csv_to(f, devices, time_tracker, False, oracle_cursor, batch_size)
+        
+        ctx = self._build_context(devices, time_tracker)
+        rows = None
+        if oracle_cursor is not None:
+            rows = self._iter_rows_to_oracle(self._iter_daily_rows(ctx), oracle_cursor, batch_size)
+        lines = self._iter_csv_lines(ctx, bom=not compress, rows=rows)
         
-        # 定義 CSV 標題 (對應 FineBI 欄位)
-        headers = ['日期', '設備名稱', 'IP地址', '執行腳本', '運行時數(小時)', '在線時數(小時)', '離線時數(小時)']
-        cw.writerow(headers)
+        count = -1  # 不計標題列
+        if compress:
+            # 報表內容重複性高，level 1 幾乎不耗 CPU 即可大幅減少寫出的位元組
+            with gzip.GzipFile(fileobj=out, mode='wb', compresslevel=1) as gz:
+                write = gz.write
+                for line in lines:
+                    write(line.encode('utf-8'))
+                    count += 1
+            return count
         
-        rows = self._get_daily_rows(devices, time_tracker)
-        cw.writerows(rows)
-            
-        return si.getvalue()
+        write = out.write
+        for line in lines:
+            write(line)
+            count += 1
+        return count
 
-    def write_to_oracle(self, devices: List[Dict], time_tracker):
+    @staticmethod
+    def _iter_rows_to_oracle(rows: Iterable[Tuple[Any, ...]], cursor, batch_size: int) -> Iterator[Tuple[Any, ...]]:
+        """逐批寫入 Oracle 後再依序交出該批資料列，供 CSV 輸出共用同一次走訪"""
+        written = 0
+        offset = 0
+        for batch in _chunks(rows, batch_size):
+            written += _write_oracle_batch(cursor, batch, offset)
+            offset += len(batch)
+            yield from batch
+        print(f"成功寫入 {written} 筆數據到 Oracle")
+
+    def write_to_oracle(self, devices: List[Dict], time_tracker) -> int:
         """
         將數據寫入 Oracle 19c 數據庫
+        逐批 (ORACLE_BATCH_SIZE 筆) 呼叫 executemany，避免一次綁定過大的陣列
+        以 batcherrors 逐筆回報失敗的列，每批寫入後 commit
+        :return: 成功寫入的資料筆數
         """
-        rows = self._get_daily_rows(devices, time_tracker)
-        print(f"[DataExporter] 準備寫入 {len(rows)} 筆數據到 Oracle...")
+        if not self.db_config:
+            print("[DataExporter] 未設定 db_config，略過寫入 Oracle")
+            return 0
         
-        # TODO: 實作 Oracle 連接與寫入邏輯
-        # 範例代碼 (需安裝 cx_Oracle 或 oracledb):
-        """
+        print("[DataExporter] 準備分批寫入數據到 Oracle...")
+        total = 0
         try:
-            import cx_Oracle
+            # python-oracledb 預設為 thin mode，不需安裝 Oracle Instant Client
+            import oracledb
             # 建立連線
-            dsn = cx_Oracle.makedsn(self.db_config['host'], self.db_config['port'], service_name=self.db_config['service_name'])
-            with cx_Oracle.connect(user=self.db_config['user'], password=self.db_config['password'], dsn=dsn) as connection:
+            dsn = f"{self.db_config['host']}:{self.db_config['port']}/{self.db_config['service_name']}"
+            with oracledb.connect(user=self.db_config['user'], password=self.db_config['password'], dsn=dsn) as connection:
+                connection.autocommit = False
                 with connection.cursor() as cursor:
-                    # 假設資料表為 DEVICE_STATS
-                    sql = "INSERT INTO DEVICE_STATS (EXPORT_TIME, DEVICE_NAME, IP, SCRIPT, RUN_TIME, ONLINE_TIME, OFFLINE_TIME) VALUES (:1, :2, :3, :4, :5, :6, :7)"
-                    cursor.executemany(sql, rows)
-                    connection.commit()
-                    print(f"成功寫入 {len(rows)} 筆數據")
+                    cursor.arraysize = ORACLE_BATCH_SIZE
+                    # 依資料表結構預先宣告綁定型別/長度，避免每批重新推斷
+                    cursor.setinputsizes(oracledb.DB_TYPE_DATE, *ORACLE_VARCHAR_SIZES,
+                                         oracledb.NUMBER, oracledb.NUMBER, oracledb.NUMBER)
+                    
+                    # 寫入資料庫不需要排序
+                    rows = self._iter_daily_rows(self._build_context(devices, time_tracker, sort_dates=False))
+                    for batch_no, batch in enumerate(_chunks(rows, ORACLE_BATCH_SIZE)):
+                        total += _write_oracle_batch(cursor, batch, batch_no * ORACLE_BATCH_SIZE)
+                    
+                    print(f"成功寫入 {total} 筆數據")
         except Exception as e:
             print(f"寫入 Oracle 失敗: {e}")
-        """
-        pass
+        return total
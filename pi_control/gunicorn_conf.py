@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+"""
+Gunicorn 設定檔 (正式環境)
+用法 (於 pi_control 目錄下):
+    gunicorn -c gunicorn_conf.py main_new:app
+    gunicorn -c gunicorn_conf.py -b 0.0.0.0:8081 main_viewer:app
+"""
+
+bind = '0.0.0.0:8080'
+
+# 只開一個 worker：控制器、時數追蹤與 SSE 訂閱者都是行程內狀態，
+# 多個 worker 會各自輪詢設備並同時寫入 time_tracker.json
+workers = 1
+
+# SSH 探測屬 I/O 等待，以線程提高並行度 (需與 web_common.SERVER_THREADS 一致)
+# SSE 長連線各佔一條線程，同時最多 web_common.MAX_SSE_SUBSCRIBERS 條，
+# 其餘線程保留給一般 API 請求；超過上限的分頁改為定時輪詢 /api/devices
+worker_class = 'gthread'
+threads = 32
+
+# SSE 串流為長連線，逾時需大於 keepalive 間隔
+timeout = 60
+graceful_timeout = 10
+keepalive = 5
@@ -1,13 +1,27 @@
-import fitz  # PyMuPDF
+# fitz (PyMuPDF) 與 PIL 載入耗時，延到第一次開啟/渲染 PDF 時才在函式內匯入，讓視窗先顯示
 import tkinter as tk
 from tkinter import filedialog, messagebox, simpledialog
-from PIL import Image, ImageTk
 import os
 import urllib.request
 import tempfile
 import re
 import json
 import sys
+import shutil
+from collections import OrderedDict
+
+# 頁面影像快取的最大筆數 (以 頁碼/旋轉/縮放 為鍵) 與總像素位元組上限
+RENDER_CACHE_SIZE = 8
+RENDER_CACHE_BYTES = 96 * 1024 * 1024
+# 頁面 DisplayList 快取筆數 (內容串流只解析一次，縮放/旋轉時直接重新光柵化)
+DISPLAYLIST_CACHE_SIZE = 8
+# 閒置多久 (毫秒) 後釋放 MuPDF 內部快取的字型與圖片
+IDLE_RELEASE_MS = 30000
+# 每次放大/縮小的倍率；縮放值固定為 ZOOM_FACTOR ** 階數，避免連乘累積浮點誤差使快取鍵失配
+ZOOM_FACTOR = 1.2
+# clean_url 使用的正規表示式 (每次掃描 QR code 都會呼叫，預先編譯)
+_URL_STRIP = re.compile(r"[#?].*$")
+_DRIVE_ID = re.compile(r"/d/([a-zA-Z0-9_-]+)")
 
 class PDFViewer:
     def __init__(self, root):
@@ -18,6 +32,7 @@ class PDFViewer:
         self.doc = None
         self.page_index = 0
         self.zoom = 1.0
+        self._zoom_step = 0
         self.rotation = 0
         self.fullscreen = False
         self.pdf_filename = ""
@@ -32,16 +47,30 @@ class PDFViewer:
         self.temp_files = []
         self.render_timer = None
         
+        # 已渲染頁面影像的 LRU 快取 {(page_index, rotation, zoom): PIL.Image}
+        # 拖曳、滾動、重繪時直接重用，不必重新光柵化
+        self._render_cache = OrderedDict()
+        self._render_cache_bytes = 0
+        self._displaylists = OrderedDict()  # {page_index: fitz.DisplayList}
+        self._idle_release_job = None
+        self._prefetch_gen = 0  # 每次重繪遞增，使過期的預先渲染工作自動放棄
+        
         # 滾動和拖曳相關
         self.scroll_x = 0
         self.scroll_y = 0
         self.drag_start_x = 0
         self.drag_start_y = 0
         self.is_dragging = False
+        self._drag_render_pending = None  # 拖曳/滾動時已排程、尚未執行的重繪
+        self.tk_img = None
+        self._blit_src = None  # 目前 tk_img 內容對應的 PIL 影像
+        self._last_canvas_wh = (0, 0)  # 上次成功渲染時的畫布尺寸
         
         # 最近開啟檔案 - 確保在任何方法調用前初始化
         self.recent_files = []
         self.config_file = os.path.join(os.path.expanduser("~"), ".pdf_viewer_recent.json")
+        self._recent_dirty = False      # 列表有變更、尚未寫回檔案
+        self._recent_save_job = None    # 合併多次變更的延遲寫入
         
         # 初始化
         self._load_recent_files()
@@ -55,6 +84,8 @@ class PDFViewer:
         """設置使用者介面"""
         self.canvas = tk.Canvas(self.root, bg="gray")
         self.canvas.pack(fill=tk.BOTH, expand=True)
+        # 常駐的頁面影像項目：重繪時只更新影像內容與座標，不重建畫布項目
+        self._img_id = self.canvas.create_image(0, 0, anchor=tk.CENTER)
         
         # 綁定滑鼠事件
         self.canvas.bind("<Button-1>", self._on_mouse_down)
@@ -110,7 +141,10 @@ class PDFViewer:
         self.root.bind("<Key>", lambda e: self.stop_auto_page())
 
     def _on_window_resize(self, event):
-        """視窗大小改變時的防抖動處理"""
+        """視窗大小改變時的防抖動處理 (移動視窗等尺寸未變的 Configure 事件直接略過)"""
+        # 綁定在 root 上會收到所有子元件的事件，因此以畫布實際尺寸比較
+        if (self.canvas.winfo_width(), self.canvas.winfo_height()) == self._last_canvas_wh:
+            return
         if self.render_timer:
             self.root.after_cancel(self.render_timer)
         self.render_timer = self.root.after(100, self.render_page)
@@ -146,20 +180,48 @@ class PDFViewer:
                 with open(self.config_file, 'r', encoding='utf-8') as f:
                     data = json.load(f)
                     self.recent_files = data.get('recent_files', [])
-                    # 過濾掉不存在的檔案
-                    self.recent_files = [f for f in self.recent_files if os.path.exists(f)]
         except Exception as e:
             print(f"載入最近檔案列表時發生錯誤: {e}")
             self.recent_files = []
+        # 檔案存在檢查延後到視窗顯示之後，避免網路磁碟拖慢啟動
+        self.root.after_idle(self._prune_recent_files)
+
+    def _prune_recent_files(self):
+        """過濾掉不存在的檔案 (每個檔案只 stat 一次)"""
+        existing = []
+        for path in self.recent_files:
+            try:
+                os.stat(path)
+            except OSError:
+                continue
+            existing.append(path)
+        if len(existing) != len(self.recent_files):
+            self.recent_files = existing
+            self._mark_recent_dirty()
 
     def _save_recent_files(self):
-        """儲存最近開啟的檔案列表"""
+        """儲存最近開啟的檔案列表 (僅在有變更時寫入，先寫暫存檔再替換避免中斷時損毀)"""
+        if self._recent_save_job:
+            self.root.after_cancel(self._recent_save_job)
+            self._recent_save_job = None
+        if not self._recent_dirty:
+            return
+        tmp_path = self.config_file + ".tmp"
         try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
                 json.dump({'recent_files': self.recent_files}, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.config_file)
+            self._recent_dirty = False
         except Exception as e:
             print(f"儲存最近檔案列表時發生錯誤: {e}")
 
+    def _mark_recent_dirty(self):
+        """標記列表已變更，500ms 內的多次變更合併為一次寫入"""
+        self._recent_dirty = True
+        if self._recent_save_job:
+            self.root.after_cancel(self._recent_save_job)
+        self._recent_save_job = self.root.after(500, self._save_recent_files)
+
     def _add_to_recent_files(self, file_path):
         """將檔案加入最近開啟列表"""
         # 取得絕對路徑
@@ -174,6 +236,7 @@ class PDFViewer:
         
         # 只保留最近 5 個檔案
         self.recent_files = self.recent_files[:5]
+        self._mark_recent_dirty()
 
     def show_recent_files(self):
         """顯示最近開啟的檔案"""
@@ -194,6 +257,7 @@ class PDFViewer:
             # 從列表中移除不存在的檔案
             if file_path in self.recent_files:
                 self.recent_files.remove(file_path)
+                self._mark_recent_dirty()
 
     # === 檔案操作 ===
     def open_pdf(self):
@@ -236,10 +300,10 @@ class PDFViewer:
     def clean_url(self, url):
         """清理和轉換 URL"""
         url = url.strip()
-        url = re.sub(r"[#?].*$", "", url)
+        url = _URL_STRIP.sub("", url)
         
         if "drive.google.com/file/d/" in url:
-            match = re.search(r"/d/([a-zA-Z0-9_-]+)", url)
+            match = _DRIVE_ID.search(url)
             if match:
                 file_id = match.group(1)
                 url = f"https://drive.google.com/uc?export=download&id={file_id}"
@@ -249,17 +313,30 @@ class PDFViewer:
     def download_pdf(self, url):
         """下載 PDF 檔案"""
         try:
-            response = urllib.request.urlopen(url, timeout=30)
-            content_type = response.headers.get("Content-Type", "")
-            
-            if "pdf" not in content_type.lower():
-                return None
-            
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
-            temp_file.write(response.read())
-            temp_file.close()
+            with urllib.request.urlopen(url, timeout=30) as response:
+                content_type = response.headers.get("Content-Type", "")
+                
+                if "pdf" not in content_type.lower():
+                    return None
+                
+                # 以 1MB 區塊串流寫入磁碟，避免整份 PDF 先讀進記憶體
+                temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
+                # 建立後立即登記，確保任何情況下結束時都會清除
+                self.temp_files.append(temp_file.name)
+                try:
+                    try:
+                        shutil.copyfileobj(response, temp_file, 1024 * 1024)
+                    finally:
+                        temp_file.close()
+                except BaseException:
+                    # 下載中斷：立即刪除殘缺檔案
+                    self.temp_files.remove(temp_file.name)
+                    try:
+                        os.unlink(temp_file.name)
+                    except OSError:
+                        pass
+                    raise
             
-            self.temp_files.append(temp_file.name)
             return temp_file.name
             
         except urllib.error.URLError as e:
@@ -274,10 +351,12 @@ class PDFViewer:
         try:
             if self.doc:
                 self.doc.close()
+            self._clear_render_cache()
             
+            import fitz  # PyMuPDF
             self.doc = fitz.open(path)
             self.page_index = 0
-            self.zoom = 1.0
+            self._set_zoom_step(0)
             self.rotation = 0
             
             # 第一次開啟 PDF 時自動最大化視窗
@@ -307,62 +386,156 @@ class PDFViewer:
             return
         
         try:
-            page = self.doc.load_page(self.page_index)
             canvas_width = self.canvas.winfo_width()
             canvas_height = self.canvas.winfo_height()
             
             if canvas_width <= 1 or canvas_height <= 1:
                 return
             
-            # 計算縮放比例
-            zoom_x = (canvas_width / page.rect.width) * self.zoom
-            zoom_y = (canvas_height / page.rect.height) * self.zoom
-            zoom = min(zoom_x, zoom_y)
-            
-            # 提高渲染品質：使用更高的 DPI
-            # 當放大時，使用額外的品質係數來保持清晰度
-            quality_factor = max(1.5, self.zoom)  # 放大時提高渲染品質
-            render_zoom = zoom * quality_factor
-            
-            mat = fitz.Matrix(render_zoom, render_zoom).prerotate(self.rotation)
-            
-            # 使用高品質渲染參數
-            pix = page.get_pixmap(matrix=mat, alpha=False)
-            
-            # 將渲染結果轉換為 PIL Image
-            img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-            
-            # 如果使用了品質係數，需要縮放回正確的顯示大小
-            if quality_factor > 1.0:
-                display_width = int(pix.width / quality_factor)
-                display_height = int(pix.height / quality_factor)
-                # 使用高品質的重採樣方法
-                img = img.resize((display_width, display_height), Image.Resampling.LANCZOS)
-            
-            # 計算圖片位置（考慮滾動偏移）
-            img_width, img_height = img.size
-            img_x = canvas_width // 2 - self.scroll_x
-            img_y = canvas_height // 2 - self.scroll_y
+            img = self._ensure_image(canvas_width, canvas_height)
+            self._blit(img, canvas_width, canvas_height)
+            self._update_status()
+            self._last_canvas_wh = (canvas_width, canvas_height)
             
-            # 限制滾動範圍
-            max_scroll_x = max(0, (img_width - canvas_width) // 2)
-            max_scroll_y = max(0, (img_height - canvas_height) // 2)
-            self.scroll_x = max(-max_scroll_x, min(max_scroll_x, self.scroll_x))
-            self.scroll_y = max(-max_scroll_y, min(max_scroll_y, self.scroll_y))
+            # 一段時間沒有操作後釋放 MuPDF 內部快取
+            if self._idle_release_job:
+                self.root.after_cancel(self._idle_release_job)
+            self._idle_release_job = self.root.after(IDLE_RELEASE_MS, self._release_idle_memory)
             
-            # 重新計算位置
-            img_x = canvas_width // 2 - self.scroll_x
-            img_y = canvas_height // 2 - self.scroll_y
-            
-            self.tk_img = ImageTk.PhotoImage(img)
-            self.canvas.delete("all")
-            self.canvas.create_image(img_x, img_y, image=self.tk_img, anchor=tk.CENTER)
-
-            self._update_status()
+            # 閒置時預先渲染下一頁與上一頁，換頁時可直接使用快取
+            self._prefetch_gen += 1
+            neighbors = [i for i in (self.page_index + 1, self.page_index - 1) if 0 <= i < len(self.doc)]
+            if neighbors:
+                self.root.after_idle(self._prefetch_neighbors, self._prefetch_gen, neighbors,
+                                     canvas_width, canvas_height)
             
         except Exception as e:
             print(f"渲染頁面時發生錯誤: {e}")
 
+    def _prefetch_neighbors(self, generation, pages, canvas_width, canvas_height):
+        """預先渲染鄰近頁面 (每次閒置只處理一頁；期間若已換頁或重繪則放棄)"""
+        if generation != self._prefetch_gen or not self.doc:
+            return
+        try:
+            self._ensure_image(canvas_width, canvas_height, pages[0])
+        except Exception as e:
+            print(f"預先渲染頁面時發生錯誤: {e}")
+            return
+        if len(pages) > 1:
+            self.root.after_idle(self._prefetch_neighbors, generation, pages[1:],
+                                 canvas_width, canvas_height)
+
+    def _ensure_image(self, canvas_width, canvas_height, page_index=None):
+        """取得頁面 (預設為目前頁) 在目前視窗大小與縮放下的影像"""
+        if page_index is None:
+            page_index = self.page_index
+        displaylist = self._get_displaylist(page_index)
+        
+        # 計算縮放比例 (DisplayList 的範圍即頁面範圍)
+        rect = displaylist.rect
+        zoom_x = (canvas_width / rect.width) * self.zoom
+        zoom_y = (canvas_height / rect.height) * self.zoom
+        zoom = min(zoom_x, zoom_y)
+        
+        return self._render_to_image(page_index, zoom, self.rotation, displaylist)
+
+    def _get_displaylist(self, page_index):
+        """取得頁面的 DisplayList (解析過的繪圖指令，LRU 快取)"""
+        displaylist = self._displaylists.get(page_index)
+        if displaylist is not None:
+            self._displaylists.move_to_end(page_index)
+            return displaylist
+        
+        displaylist = self.doc.load_page(page_index).get_displaylist()
+        self._displaylists[page_index] = displaylist
+        if len(self._displaylists) > DISPLAYLIST_CACHE_SIZE:
+            self._displaylists.popitem(last=False)
+        return displaylist
+
+    def _render_to_image(self, page_index, zoom, rotation, displaylist=None):
+        """將頁面光柵化為 PIL Image (相同頁碼/旋轉/縮放直接取用快取)"""
+        key = (page_index, rotation, round(zoom, 3))
+        img = self._render_cache.get(key)
+        if img is not None:
+            self._render_cache.move_to_end(key)
+            return img
+        
+        if displaylist is None:
+            displaylist = self._get_displaylist(page_index)
+        
+        import fitz
+        from PIL import Image
+        
+        # 直接以顯示大小光柵化：MuPDF 本身即有反鋸齒，不需先放大再以 LANCZOS 縮回
+        mat = fitz.Matrix(zoom, zoom).prerotate(rotation)
+        pix = displaylist.get_pixmap(matrix=mat, alpha=False)
+        
+        # 將渲染結果轉換為 PIL Image：samples_mv 直接指向 MuPDF 的像素緩衝區，
+        # 省去 pix.samples 先複製成 bytes 的那一次 (RGB 模式下 PIL 仍會複製一次，故不需保留 pix)
+        img = Image.frombuffer("RGB", (pix.width, pix.height), pix.samples_mv, "raw", "RGB", pix.stride, 1)
+        
+        self._render_cache[key] = img
+        self._render_cache_bytes += self._image_bytes(img)
+        
+        # 超過筆數或位元組上限時淘汰最久未用的影像 (至少保留剛渲染的這張)
+        over_budget = self._render_cache_bytes > RENDER_CACHE_BYTES
+        while len(self._render_cache) > 1 and (len(self._render_cache) > RENDER_CACHE_SIZE
+                                               or self._render_cache_bytes > RENDER_CACHE_BYTES):
+            _, old = self._render_cache.popitem(last=False)
+            self._render_cache_bytes -= self._image_bytes(old)
+        if over_budget:
+            # 只有頁面影像超過位元組上限 (例如大型掃描檔) 才一併釋放一半 MuPDF store；
+            # 一般換頁只按筆數淘汰，保留鄰頁預先載入的字型與圖片
+            self._shrink_store(50)
+        return img
+
+    @staticmethod
+    def _image_bytes(img):
+        """影像佔用的像素位元組數"""
+        return img.width * img.height * len(img.getbands())
+
+    def _clear_render_cache(self):
+        """清空頁面影像與 DisplayList 快取"""
+        self._render_cache.clear()
+        self._render_cache_bytes = 0
+        self._displaylists.clear()
+
+    def _release_idle_memory(self):
+        """閒置一段時間後清空 MuPDF store (頁面影像快取保留，已有上限)"""
+        self._idle_release_job = None
+        self._shrink_store(100)
+
+    @staticmethod
+    def _shrink_store(percent):
+        """釋放 MuPDF store 的指定百分比"""
+        import fitz
+        fitz.TOOLS.store_shrink(percent)
+
+    def _blit(self, img, canvas_width, canvas_height):
+        """將影像依滾動位置貼到畫布上 (不涉及光柵化)"""
+        img_width, img_height = img.size
+        
+        # 限制滾動範圍
+        max_scroll_x = max(0, (img_width - canvas_width) // 2)
+        max_scroll_y = max(0, (img_height - canvas_height) // 2)
+        self.scroll_x = max(-max_scroll_x, min(max_scroll_x, self.scroll_x))
+        self.scroll_y = max(-max_scroll_y, min(max_scroll_y, self.scroll_y))
+        
+        # 計算圖片位置（考慮滾動偏移）
+        img_x = canvas_width // 2 - self.scroll_x
+        img_y = canvas_height // 2 - self.scroll_y
+        
+        if img is not self._blit_src:
+            if self.tk_img is not None and (self.tk_img.width(), self.tk_img.height()) == img.size:
+                # 尺寸相同 (換頁、同縮放)：直接覆寫既有 PhotoImage
+                self.tk_img.paste(img)
+            else:
+                from PIL import ImageTk
+                self.tk_img = ImageTk.PhotoImage(img)
+                self.canvas.itemconfig(self._img_id, image=self.tk_img)
+            self._blit_src = img
+        self.canvas.coords(self._img_id, img_x, img_y)
+
     def _update_status(self):
         """更新狀態列"""
         status_text = f"檔案：{self.pdf_filename} | 第 {self.page_index + 1} 頁 / 共 {len(self.doc)} 頁"
@@ -392,7 +565,7 @@ class PDFViewer:
                 self.scroll_y -= dy
                 self.drag_start_x = event.x
                 self.drag_start_y = event.y
-                self.render_page()
+                self._schedule_render()
 
     def _on_mouse_up(self, event):
         """滑鼠放開事件"""
@@ -422,13 +595,23 @@ class PDFViewer:
         """向上滾動"""
         if self.zoom > 1.0:
             self.scroll_y -= 50
-            self.render_page()
+            self._schedule_render()
 
     def _scroll_down(self):
         """向下滾動"""
         if self.zoom > 1.0:
             self.scroll_y += 50
-            self.render_page()
+            self._schedule_render()
+
+    def _schedule_render(self):
+        """合併短時間內的多次重繪 (最多約每 16ms 一次，只畫最後的位置)"""
+        if self._drag_render_pending is None:
+            self._drag_render_pending = self.root.after(16, self._flush_drag_render)
+
+    def _flush_drag_render(self):
+        """執行排程中的重繪"""
+        self._drag_render_pending = None
+        self.render_page()
 
     # === 導航功能 ===
     def prev_page(self):
@@ -486,16 +669,21 @@ class PDFViewer:
             self.render_page()
 
     # === 檢視控制 ===
+    def _set_zoom_step(self, step):
+        """設定縮放階數 (縮放值由階數直接計算)"""
+        self._zoom_step = step
+        self.zoom = ZOOM_FACTOR ** step
+
     def zoom_in(self):
         """放大"""
         self.stop_auto_page()
-        self.zoom *= 1.2
+        self._set_zoom_step(self._zoom_step + 1)
         self.render_page()
 
     def zoom_out(self):
         """縮小"""
         self.stop_auto_page()
-        self.zoom /= 1.2
+        self._set_zoom_step(self._zoom_step - 1)
         # 縮小時重設滾動位置
         if self.zoom <= 1.0:
             self.scroll_x = 0
@@ -505,7 +693,7 @@ class PDFViewer:
     def reset_zoom(self):
         """重設縮放"""
         self.stop_auto_page()
-        self.zoom = 1.0
+        self._set_zoom_step(0)
         self.scroll_x = 0
         self.scroll_y = 0
         self.render_page()
@@ -538,12 +726,15 @@ class PDFViewer:
 
     def auto_next_page(self, seconds):
         """自動換至下一頁"""
+        previous = self.page_index
         if self.page_index < self.auto_end_page:
             self.page_index += 1
         else:
             self.page_index = self.auto_start_page
         
-        self.render_page()
+        # 起訖為同一頁時畫面不變，不必重繪
+        if self.page_index != previous:
+            self.render_page()
         self.auto_page_job = self.root.after(seconds * 1000, self.auto_next_page, seconds)
 
     def stop_auto_page(self):
@@ -641,7 +832,7 @@ class AutoPageDialog:
         
         self.top = tk.Toplevel(parent)
         self.top.title("自訂自動換頁")
-        self.top.geometry("320x220")
+        self.top.geometry("320x240")
         self.top.transient(parent)
         self.top.resizable(False, False)
         
@@ -655,28 +846,34 @@ class AutoPageDialog:
         """創建對話框元件"""
         # 秒數設定
         tk.Label(self.top, text="換頁間隔（秒）：").pack(pady=5)
-        self.entry_seconds = tk.Entry(self.top, width=20)
-        self.entry_seconds.insert(0, "5")
-        self.entry_seconds.pack()
+        self.var_seconds = tk.StringVar(self.top, value="5")
+        tk.Entry(self.top, width=20, textvariable=self.var_seconds).pack()
 
         # 起始頁設定
         tk.Label(self.top, text=f"起始頁（1 到 {self.total_pages}）：").pack(pady=5)
-        self.entry_start = tk.Entry(self.top, width=20)
-        self.entry_start.insert(0, "1")
-        self.entry_start.pack()
+        self.var_start = tk.StringVar(self.top, value="1")
+        tk.Entry(self.top, width=20, textvariable=self.var_start).pack()
 
         # 結束頁設定
         tk.Label(self.top, text=f"結束頁（起始頁 到 {self.total_pages}）：").pack(pady=5)
-        self.entry_end = tk.Entry(self.top, width=20)
-        self.entry_end.insert(0, str(self.total_pages))
-        self.entry_end.pack()
+        self.var_end = tk.StringVar(self.top, value=str(self.total_pages))
+        tk.Entry(self.top, width=20, textvariable=self.var_end).pack()
+
+        # 輸入不正確時的提示 (取代錯誤對話框)
+        self.hint = tk.Label(self.top, text="", fg="red")
+        self.hint.pack()
 
         # 按鈕
         btn_frame = tk.Frame(self.top)
-        btn_frame.pack(pady=15)
-        tk.Button(btn_frame, text="開始", command=self._submit, width=8).pack(side=tk.LEFT, padx=5)
+        btn_frame.pack(pady=5)
+        self.start_button = tk.Button(btn_frame, text="開始", command=self._submit, width=8)
+        self.start_button.pack(side=tk.LEFT, padx=5)
         tk.Button(btn_frame, text="取消", command=self.top.destroy, width=8).pack(side=tk.LEFT, padx=5)
 
+        # 輸入變更時即時檢查，不正確就停用「開始」按鈕
+        for var in (self.var_seconds, self.var_start, self.var_end):
+            var.trace_add("write", self._validate)
+
     def _center_window(self, parent):
         """將對話框置中於父視窗"""
         self.top.update_idletasks()
@@ -684,25 +881,33 @@ class AutoPageDialog:
         y = parent.winfo_y() + (parent.winfo_height() // 2) - (self.top.winfo_height() // 2)
         self.top.geometry(f"+{x}+{y}")
 
+    def _parse(self):
+        """檢查輸入，回傳 ((秒數, 起始頁, 結束頁), 錯誤訊息)，兩者其一為 None"""
+        fields = [var.get().strip() for var in (self.var_seconds, self.var_start, self.var_end)]
+        if not all(field.isdecimal() for field in fields):
+            return None, "請輸入正整數"
+        seconds, start_page, end_page = map(int, fields)
+        if seconds < 1:
+            return None, "秒數必須大於 0"
+        if start_page < 1 or start_page > self.total_pages:
+            return None, f"起始頁必須在 1 到 {self.total_pages} 之間"
+        if end_page < start_page or end_page > self.total_pages:
+            return None, f"結束頁必須在 {start_page} 到 {self.total_pages} 之間"
+        return (seconds, start_page, end_page), None
+
+    def _validate(self, *_):
+        """依輸入是否正確切換「開始」按鈕與提示文字"""
+        values, error = self._parse()
+        self.start_button.config(state=tk.NORMAL if values else tk.DISABLED)
+        self.hint.config(text=error or "")
+
     def _submit(self):
         """提交設定"""
-        try:
-            seconds = int(self.entry_seconds.get())
-            start_page = int(self.entry_start.get())
-            end_page = int(self.entry_end.get())
-            
-            if seconds < 1:
-                raise ValueError("秒數必須大於 0")
-            if start_page < 1 or start_page > self.total_pages:
-                raise ValueError(f"起始頁必須在 1 到 {self.total_pages} 之間")
-            if end_page < start_page or end_page > self.total_pages:
-                raise ValueError(f"結束頁必須在 {start_page} 到 {self.total_pages} 之間")
-            
-            self.callback(seconds, start_page, end_page)
-            self.top.destroy()
-            
-        except ValueError as e:
-            messagebox.showerror("輸入錯誤", str(e))
+        values, _ = self._parse()
+        if values is None:
+            return
+        self.callback(*values)
+        self.top.destroy()
 
 
 if __name__ == "__main__":
@@ -4,6 +4,7 @@
 import tkinter as tk
 from tkinter import messagebox, filedialog
 import subprocess
+import threading
 import os
 import webbrowser
 import sys
@@ -77,12 +78,15 @@ def open_input():
         try:
             if sys.platform == 'win32':
                 os.startfile(input_text)
-            elif sys.platform == 'darwin':
-                subprocess.run(['open', input_text], check=True)
             else:
-                subprocess.run(['xdg-open', input_text], check=True)
+                # 不等待開啟程式結束，避免介面卡住 (獨立 session，關閉本工具也不影響檢視器)
+                # 由背景線程回收子程序，不留下殭屍程序
+                opener = 'open' if sys.platform == 'darwin' else 'xdg-open'
+                proc = subprocess.Popen([opener, input_text], start_new_session=True,
+                                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                threading.Thread(target=proc.wait, daemon=True).start()
             log_opened_file(input_text)
-        except (subprocess.CalledProcessError, OSError):
+        except OSError:
             messagebox.showerror(lang["error"], lang["open_fail"])
         except Exception as e:
             messagebox.showerror(lang["error"], f"{lang['open_fail']}\n{e}")
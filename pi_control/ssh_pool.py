@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SSH 連線池模組
+依 (ip, user) 重用已認證的 paramiko.SSHClient，避免每次操作都重新握手與密碼驗證
+(線程安全，含閒置逾時、最長存活時間與連線健康檢查)
+"""
+
+import socket
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+import paramiko
+
+IDLE_TIMEOUT = 300   # 閒置超過 5 分鐘的連線於清理時關閉
+MAX_AGE = 3600       # 連線最長使用 1 小時後重建
+KEEPALIVE = 30       # transport keepalive 間隔 (秒)
+
+# 握手演算法偏好：只保留較快的現代演算法，並各留一組退路以相容舊版 sshd
+PREFERRED_KEX = ('curve25519-sha256@libssh.org', 'ecdh-sha2-nistp256')
+PREFERRED_CIPHERS = ('aes128-gcm@openssh.com', 'aes128-ctr')
+PREFERRED_KEY_TYPES = ('ssh-ed25519', 'ecdsa-sha2-nistp256', 'rsa-sha2-256')
+
+
+def fast_transport(sock, **kwargs) -> paramiko.Transport:
+    """
+    建立限定演算法的 Transport (供 SSHClient.connect 的 transport_factory 使用)
+    縮短 KEX 協商清單，降低 Pi 端的握手成本 (壓縮維持 SSHClient 預設的關閉)
+    """
+    transport = paramiko.Transport(sock, **kwargs)
+    opts = transport.get_security_options()
+    for attr, preferred in (('kex', PREFERRED_KEX),
+                            ('ciphers', PREFERRED_CIPHERS),
+                            ('key_types', PREFERRED_KEY_TYPES)):
+        supported = getattr(opts, attr)
+        pinned = tuple(name for name in preferred if name in supported)
+        if pinned:
+            setattr(opts, attr, pinned)
+    return transport
+
+
+def tcp_probe(ip: str, port: int = 22, timeout: float = 1.0) -> bool:
+    """TCP 連線探測 (預設 SSH 端口)，不 fork 子程序，也代表 SSH 服務可連線"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(timeout)
+        return sock.connect_ex((ip, port)) == 0
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+
+class SSHPool:
+    """每台設備的 SSH 連線池 (Thread-Safe)"""
+
+    def __init__(self, connect: Callable[..., Optional[paramiko.SSHClient]],
+                 idle_timeout: int = IDLE_TIMEOUT, max_age: int = MAX_AGE):
+        """
+        :param connect: 建立新連線的函式 connect(device, timeout=...) -> SSHClient 或 None
+        """
+        self._connect = connect
+        self.idle_timeout = idle_timeout
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        # {(ip, user): deque[(client, last_used, created_at)]}
+        self._pools: Dict[Tuple[str, str], deque] = {}
+
+    @staticmethod
+    def _key(device: Dict) -> Tuple[str, str]:
+        return device['ip'], device['user']
+
+    @staticmethod
+    def _is_alive(client: paramiko.SSHClient) -> bool:
+        transport = client.get_transport()
+        return transport is not None and transport.is_active()
+
+    @staticmethod
+    def _close(client: paramiko.SSHClient):
+        try:
+            client.close()
+        except Exception:
+            pass
+
+    def _pop(self, key: Tuple[str, str]) -> Tuple[Optional[paramiko.SSHClient], float]:
+        """取出一條可用連線，過期或失效的直接關閉"""
+        now = time.monotonic()
+        stale = []
+        found, created_at = None, now
+        with self._lock:
+            entries = self._pools.get(key)
+            while entries:
+                client, _, created = entries.pop()
+                if now - created < self.max_age and self._is_alive(client):
+                    found, created_at = client, created
+                    break
+                stale.append(client)
+        for client in stale:
+            self._close(client)
+        return found, created_at
+
+    @contextmanager
+    def acquire(self, device: Dict, timeout: int = 10) -> Iterator[Optional[paramiko.SSHClient]]:
+        """
+        取得設備的 SSH 連線，離開 with 區塊時歸還連線池
+        無法連接時回傳 None；區塊內拋出例外的連線不歸還，直接關閉
+        """
+        key = self._key(device)
+        client, created_at = self._pop(key)
+        if client is None:
+            client = self._connect(device, timeout=timeout)
+            if client is not None:
+                client.get_transport().set_keepalive(KEEPALIVE)
+                created_at = time.monotonic()
+
+        if client is None:
+            yield None
+            return
+
+        try:
+            yield client
+        except BaseException:
+            self._close(client)
+            raise
+
+        if self._is_alive(client):
+            with self._lock:
+                self._pools.setdefault(key, deque()).append((client, time.monotonic(), created_at))
+        else:
+            self._close(client)
+
+    def warm(self, device: Dict, timeout: int = 5) -> bool:
+        """預先建立一條連線放入連線池 (已有可用連線時直接歸還)，回傳是否成功"""
+        with self.acquire(device, timeout=timeout) as client:
+            return client is not None
+
+    def discard(self, device: Dict):
+        """關閉並移除指定設備的所有連線 (例如重啟/關機後)"""
+        with self._lock:
+            entries = self._pools.pop(self._key(device), None)
+        for client, _, _ in entries or ():
+            self._close(client)
+
+    def sweep(self) -> int:
+        """清理閒置、過期或失效的連線，回傳關閉數量"""
+        now = time.monotonic()
+        stale = []
+        with self._lock:
+            for key, entries in list(self._pools.items()):
+                keep = deque()
+                for entry in entries:
+                    client, last_used, created = entry
+                    if (now - last_used > self.idle_timeout or now - created > self.max_age
+                            or not self._is_alive(client)):
+                        stale.append(client)
+                    else:
+                        keep.append(entry)
+                if keep:
+                    self._pools[key] = keep
+                else:
+                    del self._pools[key]
+        for client in stale:
+            self._close(client)
+        return len(stale)
+
+    def close_all(self):
+        """關閉連線池中所有連線"""
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for entries in pools.values():
+            for client, _, _ in entries:
+                self._close(client)
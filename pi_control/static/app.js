@@ -0,0 +1,315 @@
+let devicesData = [];
+let currentView = 'grid';
+
+async function loadDevices(fresh = false) {
+    try {
+        // 手動重新整理時略過瀏覽器快取，其餘情況允許沿用短暫快取的結果
+        const response = await fetch('/api/devices', fresh ? { cache: 'no-cache' } : {});
+        devicesData = await response.json();
+        renderDevices();
+        updateStats();
+        syncUptime();
+    } catch (error) {
+        showToast('載入設備失敗: ' + error.message, 'error');
+    }
+}
+
+// 目前卡片對應的 "檢視模式 + 設備清單"；相同時只更新狀態與統計，不重建 DOM
+let renderedKey = null;
+let deviceNodes = [];  // 與 devicesData 同順序，各卡片中需要更新的節點 {badge, running, online, offline}
+
+function renderDevices() {
+    const key = currentView + '|' + devicesData.map(d => `${d.name}/${d.ip}/${d.script}`).join('|');
+    if (key === renderedKey) {
+        devicesData.forEach((device, index) => patchDevice(deviceNodes[index], device));
+        return;
+    }
+    buildDevices();
+    renderedKey = key;
+    const grid = document.getElementById('devices-grid');
+    deviceNodes = Array.from(grid.querySelectorAll('.device-card, .device-list-item'), item => {
+        const nodes = {};
+        item.querySelectorAll('[data-field]').forEach(node => nodes[node.dataset.field] = node);
+        return nodes;
+    });
+}
+
+function setText(node, text) {
+    text = String(text);
+    if (node.textContent !== text) node.textContent = text;
+}
+
+function patchDevice(nodes, device) {
+    const badgeClass = `status-badge status-${device.status}`;
+    if (nodes.badge.className !== badgeClass) nodes.badge.className = badgeClass;
+    setText(nodes.badge, getStatusText(device.status));
+    setText(nodes.running, device.stats.running);
+    setText(nodes.online, device.stats.online);
+    setText(nodes.offline, device.stats.offline);
+}
+
+function buildDevices() {
+    const grid = document.getElementById('devices-grid');
+
+    if (currentView === 'list') {
+        grid.className = 'devices-list';
+        const header = `
+            <div class="list-header">
+                <div>設備名稱</div>
+                <div>狀態</div>
+                <div>IP / 腳本</div>
+                <div>統計 (運/在/離)</div>
+                <div>操作</div>
+            </div>`;
+
+        const items = devicesData.map((device, index) => `
+            <div class="device-list-item">
+                <div class="list-col-name">
+                    <input type="checkbox" class="device-checkbox" data-index="${index}" 
+                           id="device-l-${index}" style="margin-right: 10px;">
+                    <label for="device-l-${index}" style="font-weight:bold; cursor:pointer;">${device.name}</label>
+                </div>
+                <div class="list-col-status">
+                    <span class="status-badge status-${device.status}" data-field="badge">
+                        ${getStatusText(device.status)}
+                    </span>
+                </div>
+                <div class="list-col-info" style="font-size:0.85em; color:#666;">
+                    ${device.ip}<br>
+                    <span style="opacity:0.8">${device.script || '-'}</span>
+                </div>
+                <div class="list-col-stats" style="font-family:monospace; font-size:0.85em;">
+                    <div style="color:#065f46">▶️ 運行:<span data-field="running">${device.stats.running}</span></div>
+                    <div style="color:#92400e">🟡 在線:<span data-field="online">${device.stats.online}</span></div>
+                    <div style="color:#991b1b">🔴 離線:<span data-field="offline">${device.stats.offline}</span></div>
+                </div>
+                <div class="list-col-actions">
+                    <button class="device-btn btn-start" onclick="deviceAction('${device.name}', 'start')" title="啟動">▶️</button>
+                    <button class="device-btn btn-stop" onclick="deviceAction('${device.name}', 'stop')" title="停止">⏹️</button>
+                    <button class="device-btn btn-restart" onclick="deviceAction('${device.name}', 'restart')" title="重啟應用">🔄</button>
+                    <button class="device-btn btn-reboot" onclick="deviceAction('${device.name}', 'reboot')" title="重啟設備">⚡</button>
+                </div>
+            </div>
+        `).join('');
+
+        grid.innerHTML = header + items;
+    } else {
+        grid.className = 'devices-grid';
+        grid.innerHTML = devicesData.map((device, index) => `
+            <div class="device-card">
+                <div class="device-header">
+                    <div>
+                        <input type="checkbox" class="device-checkbox" data-index="${index}" 
+                               id="device-${index}" style="margin-right: 10px;">
+                        <label for="device-${index}" class="device-name">${device.name}</label>
+                    </div>
+                    <span class="status-badge status-${device.status}" data-field="badge">
+                        ${getStatusText(device.status)}
+                    </span>
+                </div>
+                <div class="device-info">
+                    📍 ${device.ip}<br>
+                    📄 ${device.script || 'N/A'}
+                </div>
+                <div class="device-stats">
+                    <div class="stats-row">
+                        <span class="stats-label stats-running">▶️ 運行:</span>
+                        <span class="stats-value stats-running" data-field="running">${device.stats.running}</span>
+                    </div>
+                    <div class="stats-row">
+                        <span class="stats-label stats-online">🟡 在線:</span>
+                        <span class="stats-value stats-online" data-field="online">${device.stats.online}</span>
+                    </div>
+                    <div class="stats-row">
+                        <span class="stats-label stats-offline">🔴 離線:</span>
+                        <span class="stats-value stats-offline" data-field="offline">${device.stats.offline}</span>
+                    </div>
+                </div>
+                <div class="device-actions">
+                    <button class="device-btn btn-start" onclick="deviceAction('${device.name}', 'start')">▶️ 啟動</button>
+                    <button class="device-btn btn-stop" onclick="deviceAction('${device.name}', 'stop')">⏹️ 停止</button>
+                    <button class="device-btn btn-restart" onclick="deviceAction('${device.name}', 'restart')">🔄 重啟</button>
+                    <button class="device-btn btn-reboot" onclick="deviceAction('${device.name}', 'reboot')">🔄 設備</button>
+                </div>
+            </div>
+        `).join('');
+    }
+}
+
+function getStatusText(status) {
+    const map = { 'running': '✅ 運行中', 'online': '🟡 在線', 'offline': '🔴 離線' };
+    return map[status] || status;
+}
+
+function updateStats() {
+    const online = devicesData.filter(d => d.online).length;
+    const running = devicesData.filter(d => d.app_running).length;
+    document.getElementById('online-devices').textContent = online;
+    document.getElementById('running-apps').textContent = running;
+}
+
+// 伺服器回報的運行秒數與取得時間，之後每秒在瀏覽器端自行累加
+let uptimeBase = null;
+
+async function syncUptime() {
+    try {
+        const response = await fetch('/api/uptime');
+        const data = await response.json();
+        uptimeBase = { seconds: data.uptime_seconds, at: Date.now() };
+        document.getElementById('start-time').textContent = data.start_time;
+        updateUptime();
+    } catch (error) {
+        console.error('更新運行時間失敗:', error);
+    }
+}
+
+function updateUptime() {
+    if (document.visibilityState !== 'visible' || !uptimeBase) return; // 分頁在背景時不更新
+    const total = Math.floor(uptimeBase.seconds + (Date.now() - uptimeBase.at) / 1000);
+    const pad = n => String(n).padStart(2, '0');
+    document.getElementById('uptime').textContent =
+        `${pad(Math.floor(total / 3600))}:${pad(Math.floor(total % 3600 / 60))}:${pad(total % 60)}`;
+}
+
+async function deviceAction(deviceName, action) {
+    showToast(`正在執行: ${action}...`, 'info');
+
+    const formData = new FormData();
+    formData.append('device', deviceName);
+    formData.append('action', action);
+
+    const fileInput = document.getElementById('pdf-file');
+    if (fileInput.files.length > 0) {
+        formData.append('pdf_file', fileInput.files[0]);
+    }
+
+    try {
+        const response = await fetch('/api/device/action', {
+            method: 'POST',
+            body: formData
+        });
+        const result = await response.json();
+        showToast(result.message, result.success ? 'success' : 'error');
+        setTimeout(refreshStatus, 2000);
+    } catch (error) {
+        showToast('操作失敗: ' + error.message, 'error');
+    }
+}
+
+async function batchOperation(action) {
+    const selected = Array.from(document.querySelectorAll('.device-checkbox:checked'))
+        .map(cb => devicesData[cb.dataset.index].name);
+
+    const formData = new FormData();
+    formData.append('devices', JSON.stringify(selected));
+    formData.append('action', action);
+
+    const fileInput = document.getElementById('pdf-file');
+    if (fileInput.files.length > 0) {
+        formData.append('pdf_file', fileInput.files[0]);
+    }
+
+    if (selected.length === 0) {
+        showToast('請先選擇要操作的設備', 'warning');
+        return;
+    }
+
+    if (action === 'shutdown' || action === 'reboot') {
+        if (!confirm(`確定要${action === 'shutdown' ? '關機' : '重啟'} ${selected.length} 台設備嗎？`)) return;
+    }
+
+    showToast(`正在對 ${selected.length} 台設備執行 ${action}...`, 'info');
+    try {
+        const response = await fetch('/api/batch/action', {
+            method: 'POST',
+            body: formData
+        });
+        const result = await response.json();
+        showToast(`完成: ${result.success}/${selected.length} 台成功`, 'success');
+        setTimeout(refreshStatus, 3000);
+    } catch (error) {
+        showToast('批次操作失敗: ' + error.message, 'error');
+    }
+}
+
+function toggleSelectAll(checkbox) {
+    document.querySelectorAll('.device-checkbox').forEach(cb => cb.checked = checkbox.checked);
+}
+
+async function refreshStatus() {
+    showToast('正在重新整理...', 'info');
+    await loadDevices(true);
+    showToast('狀態已更新', 'success');
+}
+
+async function exportStats() {
+    try {
+        window.open('/api/export/csv', '_blank');
+        showToast('正在下載統計報表...', 'success');
+    } catch (error) {
+        showToast('匯出失敗: ' + error.message, 'error');
+    }
+}
+
+async function reloadConfig() {
+    if (!confirm('確定要重新載入 hosts.json 設定檔嗎？')) return;
+    showToast('正在讀取設定檔...', 'info');
+    try {
+        const response = await fetch('/api/config/reload', { method: 'POST' });
+        const result = await response.json();
+        showToast(result.message, result.success ? 'success' : 'error');
+        if (result.success) setTimeout(refreshStatus, 1000);
+    } catch (error) {
+        showToast('請求失敗: ' + error.message, 'error');
+    }
+}
+
+function switchView(view) {
+    currentView = view;
+    document.getElementById('btn-grid-view').classList.toggle('active', view === 'grid');
+    document.getElementById('btn-list-view').classList.toggle('active', view === 'list');
+    renderDevices();
+}
+
+function showToast(message, type = 'info') {
+    const colors = {success: '#10b981', error: '#ef4444', warning: '#f59e0b', info: '#3b82f6'};
+    const toast = document.createElement('div');
+    toast.className = 'toast';
+    toast.style.borderLeft = `5px solid ${colors[type]}`;
+    toast.textContent = message;
+    document.body.appendChild(toast);
+    setTimeout(() => toast.remove(), 3000);
+}
+
+// 伺服器推送狀態變化 (SSE)，只更新有變化的設備
+function subscribeDevices() {
+    const source = new EventSource('/api/devices/stream');
+    // 訂閱數已滿 (503) 時連線會直接關閉，改為每 30 秒輪詢一次 (內容未變時伺服器回 304)
+    source.onerror = () => {
+        if (source.readyState !== EventSource.CLOSED) return;
+        setInterval(() => {
+            if (document.visibilityState === 'visible') loadDevices();
+        }, 30000);
+    };
+    source.onmessage = (event) => {
+        JSON.parse(event.data).forEach(device => {
+            const index = devicesData.findIndex(d => d.name === device.name);
+            if (index >= 0) devicesData[index] = device;
+            else devicesData.push(device);
+        });
+        // 分頁在背景時只保存資料，回到前景再重繪
+        if (document.visibilityState !== 'visible') return;
+        renderDevices();
+        updateStats();
+    };
+}
+
+// 分頁回到前景時立即同步一次
+document.addEventListener('visibilitychange', () => {
+    if (document.visibilityState === 'visible') loadDevices();
+});
+
+// 初始載入
+loadDevices();
+subscribeDevices();
+setInterval(updateUptime, 1000); // 每秒更新運行時間 (本機計算，不發請求)
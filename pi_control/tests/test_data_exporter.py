@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""DataExporter 的 CSV 輸出一致性測試 (python -m unittest discover pi_control/tests)"""
+
+import csv
+import gzip
+import io
+import os
+import sys
+import unittest
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_exporter import CSV_HEADERS, DataExporter  # noqa: E402
+
+
+class FakeTracker:
+    """只提供匯出所需介面的時數追蹤器"""
+    devices_version = 0
+
+    def __init__(self, records):
+        self.records = records
+
+    def get_all_daily_records(self):
+        return {day: {dev: dict(s) for dev, s in devs.items()} for day, devs in self.records.items()}
+
+
+class FakeCursor:
+    """記錄 executemany 內容的 Oracle cursor"""
+
+    def __init__(self):
+        self.rows = []
+        self.calls = []
+        self.connection = self
+        self._last = 0
+
+    def executemany(self, sql, batch, **kwargs):
+        self.calls.append((sql, kwargs))
+        self.rows.extend(batch)
+        self._last = len(batch)
+
+    def getarraydmlrowcounts(self):
+        return [1] * self._last
+
+    def getbatcherrors(self):
+        return []
+
+    def commit(self):
+        pass
+
+
+DEVICES = [
+    {'name': 'pi-01', 'ip': '10.0.0.1', 'script_path': '/home/pi/pdf_viewer.py'},
+    {'name': 'pi, "02"', 'ip': '10.0.0.2', 'script_path': '/home/pi/a,b.py'},
+]
+
+RECORDS = {
+    '2025-01-01': {
+        'pi-01': {'running': 3600.0, 'online': 450.0, 'offline': 0.0},
+        'pi, "02"': {'running': 0.0, 'online': 1800.0, 'offline': 36000.0},
+    },
+    '2025-01-03': {
+        'pi-01': {'running': 5400.0},
+        'ghost\nline': {'offline': 18.0},  # 設定檔已無的設備
+    },
+    '2025-01-02': {
+        'pi-01': {'running': 86400.0, 'online': 0.0, 'offline': 0.0},
+    },
+}
+
+
+class CsvParityTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tracker = FakeTracker(RECORDS)
+        self.exporter = DataExporter()
+
+    def test_all_sinks_produce_identical_csv(self):
+        expected = ''.join(self.exporter.iter_csv(DEVICES, self.tracker))
+
+        text = io.StringIO()
+        count = self.exporter.write_csv_to(text, DEVICES, self.tracker)
+        self.assertEqual(text.getvalue(), expected)
+        self.assertEqual(count, 5)
+
+        cursor = FakeCursor()
+        tee = io.StringIO()
+        count = self.exporter.write_csv_to(tee, DEVICES, self.tracker, oracle_cursor=cursor, batch_size=2)
+        self.assertEqual(tee.getvalue(), expected)
+        self.assertEqual(count, 5)
+        self.assertEqual(len(cursor.rows), 5)
+
+        self.assertEqual(self.exporter.generate_csv(DEVICES, self.tracker), expected)
+        self.assertEqual(self.exporter.generate_csv_bytes(DEVICES, self.tracker), expected.encode('utf-8'))
+        with self.exporter.generate_csv_file(DEVICES, self.tracker) as f:
+            self.assertEqual(f.read(), expected)
+
+        cursor = FakeCursor()
+        text = io.StringIO()
+        self.assertEqual(self.exporter.export_all(text, DEVICES, self.tracker, oracle_cursor=cursor), 5)
+        self.assertEqual(text.getvalue(), expected)
+        self.assertEqual(len(cursor.rows), 5)
+
+        packed = io.BytesIO()
+        self.exporter.write_csv_to(packed, DEVICES, self.tracker, compress=True)
+        # gzip 輸出不含 BOM，其餘內容相同
+        self.assertEqual(gzip.decompress(packed.getvalue()).decode('utf-8'), expected[1:])
+
+    def test_csv_matches_csv_module_parsing(self):
+        content = ''.join(self.exporter.iter_csv(DEVICES, self.tracker))
+        self.assertTrue(content.startswith('\ufeff'))
+        rows = list(csv.reader(io.StringIO(content[1:], newline='')))
+        self.assertEqual(rows[0], CSV_HEADERS)
+        self.assertEqual(rows[1:], [
+            ['2025-01-03', 'pi-01', '10.0.0.1', '/home/pi/pdf_viewer.py', '1.50', '0.00', '0.00'],
+            ['2025-01-03', 'ghost\nline', 'N/A', 'N/A', '0.00', '0.00', '0.01'],
+            ['2025-01-02', 'pi-01', '10.0.0.1', '/home/pi/pdf_viewer.py', '24.00', '0.00', '0.00'],
+            ['2025-01-01', 'pi-01', '10.0.0.1', '/home/pi/pdf_viewer.py', '1.00', '0.12', '0.00'],
+            ['2025-01-01', 'pi, "02"', '10.0.0.2', '/home/pi/a,b.py', '0.00', '0.50', '10.00'],
+        ])
+
+    def test_oracle_rows_are_rounded_floats(self):
+        cursor = FakeCursor()
+        self.exporter.write_csv_to(io.StringIO(), DEVICES, self.tracker, oracle_cursor=cursor)
+        self.assertIn((date(2025, 1, 1), 'pi-01', '10.0.0.1', '/home/pi/pdf_viewer.py', 1.0, 0.12, 0.0), cursor.rows)
+
+    def test_oracle_batch_errors_without_direct_path_hint(self):
+        cursor = FakeCursor()
+        self.exporter.write_csv_to(io.StringIO(), DEVICES, self.tracker, oracle_cursor=cursor, batch_size=2)
+        self.assertEqual(len(cursor.calls), 3)
+        for sql, kwargs in cursor.calls:
+            # direct-path (APPEND_VALUES) 與 batcherrors 併用會觸發 ORA-38910
+            self.assertNotIn('APPEND', sql.upper())
+            self.assertTrue(sql.startswith('INSERT INTO DEVICE_DAILY_STATS (RECORD_DATE, '))
+            self.assertEqual(kwargs, {'batcherrors': True, 'arraydmlrowcounts': True})
+
+    def test_unknown_devices_do_not_enter_lookup_cache(self):
+        ''.join(self.exporter.iter_csv(DEVICES, self.tracker))
+        self.assertNotIn('ghost\nline', self.exporter._name_to_csv)
+        self.assertEqual(set(self.exporter._name_to_csv), {d['name'] for d in DEVICES})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""SSHPool 連線重用、歸還與清理測試 (以假連線代替 paramiko.SSHClient)"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ssh_pool import SSHPool  # noqa: E402
+
+
+class FakeTransport:
+    def __init__(self):
+        self.active = True
+
+    def is_active(self):
+        return self.active
+
+    def set_keepalive(self, interval):
+        pass
+
+
+class FakeClient:
+    def __init__(self):
+        self.transport = FakeTransport()
+        self.closed = False
+
+    def get_transport(self):
+        return self.transport
+
+    def close(self):
+        self.closed = True
+        self.transport.active = False
+
+
+DEVICE = {'name': 'pi-01', 'ip': '10.0.0.1', 'user': 'pi'}
+
+
+class SSHPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.created = []
+
+        def connect(device, timeout=10):
+            client = FakeClient()
+            self.created.append(client)
+            return client
+
+        self.pool = SSHPool(connect)
+
+    def test_connection_is_reused(self):
+        with self.pool.acquire(DEVICE) as first:
+            pass
+        with self.pool.acquire(DEVICE) as second:
+            pass
+        self.assertIs(first, second)
+        self.assertEqual(len(self.created), 1)
+
+    def test_failed_block_closes_connection(self):
+        with self.assertRaises(RuntimeError):
+            with self.pool.acquire(DEVICE) as client:
+                raise RuntimeError('boom')
+        self.assertTrue(client.closed)
+        with self.pool.acquire(DEVICE) as fresh:
+            self.assertIsNot(fresh, client)
+
+    def test_dead_connection_is_replaced(self):
+        with self.pool.acquire(DEVICE) as client:
+            pass
+        client.transport.active = False
+        with self.pool.acquire(DEVICE) as fresh:
+            self.assertIsNot(fresh, client)
+        self.assertTrue(client.closed)
+
+    def test_sweep_closes_idle_connections(self):
+        self.pool.idle_timeout = -1
+        with self.pool.acquire(DEVICE) as client:
+            pass
+        self.assertEqual(self.pool.sweep(), 1)
+        self.assertTrue(client.closed)
+
+    def test_unreachable_device_yields_none(self):
+        pool = SSHPool(lambda device, timeout=10: None)
+        with pool.acquire(DEVICE) as client:
+            self.assertIsNone(client)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""TimeTracker 日誌重播、單一寫入者與讀寫鎖測試"""
+
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time_tracker  # noqa: E402
+from time_tracker import RWLock, TimeTracker  # noqa: E402
+
+
+class TrackerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.data_file = os.path.join(self.tmpdir, 'time_tracker.json')
+        self.trackers = []
+
+    def tearDown(self):
+        for tracker in self.trackers:
+            self.crash(tracker)
+        shutil.rmtree(self.tmpdir)
+
+    def tracker(self) -> TimeTracker:
+        tracker = TimeTracker(self.data_file)
+        self.trackers.append(tracker)
+        return tracker
+
+    @staticmethod
+    def crash(tracker: TimeTracker):
+        """模擬行程中斷：不寫快照，只釋放寫入鎖"""
+        if tracker._lock_file is not None:
+            tracker._lock_file.close()
+            tracker._lock_file = None
+
+    @staticmethod
+    def advance(tracker: TimeTracker, device: str, seconds: float):
+        """把設備目前狀態的起點往前移，模擬經過 seconds 秒"""
+        tracker.current_status[device]['since'] -= seconds
+
+
+class JournalReplayTest(TrackerTestCase):
+
+    def test_replay_after_crash(self):
+        tracker = self.tracker()
+        tracker.update_status('pi-01', 'running')
+        self.advance(tracker, 'pi-01', 100)
+        tracker.update_status('pi-01', 'online')
+        self.assertTrue(tracker.save_data())
+
+        # 快照之後只追加日誌，接著行程中斷
+        self.advance(tracker, 'pi-01', 50)
+        tracker.update_status('pi-01', 'offline')
+        self.assertTrue(tracker.save_incremental())
+        self.assertTrue(os.path.exists(tracker.journal_file))
+        self.crash(tracker)
+
+        restored = self.tracker()
+        history = restored.history['pi-01']
+        self.assertAlmostEqual(history['running'], 100, delta=1)
+        self.assertAlmostEqual(history['online'], 50, delta=1)
+        self.assertEqual(restored._journal_seq, 1)
+        self.assertTrue(restored.dirty)
+
+    def test_snapshot_entries_and_torn_lines_are_skipped(self):
+        tracker = self.tracker()
+        tracker.update_status('pi-01', 'running')
+        self.advance(tracker, 'pi-01', 30)
+        tracker.update_status('pi-01', 'online')
+        tracker.save_incremental()
+        tracker.save_data()  # journal_seq=1 已包含在快照
+        self.crash(tracker)
+
+        # 快照前的舊日誌 (未刪除) 與斷電造成的殘缺行都不應影響載入結果
+        with open(tracker.journal_file, 'wb') as f:
+            f.write(b'{"seq":1,"history":{"pi-01":{"running":999999}}}\n{"seq":2,"hist')
+
+        restored = self.tracker()
+        self.assertAlmostEqual(restored.history['pi-01']['running'], 30, delta=1)
+        self.assertEqual(restored._journal_seq, 1)
+
+
+class SingleWriterTest(TrackerTestCase):
+
+    @unittest.skipIf(time_tracker.fcntl is None, '需要 fcntl')
+    def test_second_tracker_is_read_only(self):
+        writer = self.tracker()
+        reader = self.tracker()
+        self.assertFalse(writer.read_only)
+        self.assertTrue(reader.read_only)
+
+        reader.update_status('pi-01', 'online')
+        self.assertFalse(reader.save_data())
+        self.assertFalse(reader.save_incremental())
+        self.assertIsNone(reader.start_autosave())
+        self.assertFalse(os.path.exists(self.data_file))
+
+
+class DirtyFlagTest(TrackerTestCase):
+
+    def test_only_transitions_mark_dirty(self):
+        tracker = self.tracker()
+        tracker.update_status('pi-01', 'online')
+        self.assertTrue(tracker.dirty)
+        tracker.save_incremental()
+        self.assertFalse(tracker.dirty)
+
+        tracker.update_status('pi-01', 'online')
+        self.assertFalse(tracker.dirty)
+        self.assertIn('pi-01', tracker._dirty_devices)
+
+        tracker.update_status('pi-01', 'running')
+        self.assertTrue(tracker.dirty)
+
+
+class RWLockTest(unittest.TestCase):
+
+    def test_readers_share_and_writer_excludes(self):
+        lock = RWLock()
+        inside = []
+        both_reading = threading.Barrier(2, timeout=2)
+
+        def reader():
+            with lock.read():
+                inside.append('r')
+                both_reading.wait()  # 兩個讀取者必須能同時持有鎖
+
+        threads = [threading.Thread(target=reader) for _ in range(2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(2)
+        self.assertEqual(inside, ['r', 'r'])
+
+        order = []
+
+        def late_reader():
+            with lock.read():
+                order.append('read')
+
+        with lock.write():
+            t = threading.Thread(target=late_reader)
+            t.start()
+            time.sleep(0.05)
+            order.append('write-done')
+        t.join(2)
+        self.assertEqual(order, ['write-done', 'read'])
+
+
+if __name__ == '__main__':
+    unittest.main()
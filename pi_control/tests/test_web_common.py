@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""/api/devices 的 ETag / 304 行為與 SSE 訂閱上限測試"""
+
+import os
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import web_common  # noqa: E402
+from web_common import MAX_SSE_SUBSCRIBERS, create_app, register_monitor_routes  # noqa: E402
+
+
+class FakeMonitor:
+    """只提供路由所需介面的設備監控器 (不連線設備、不啟動背景線程)"""
+
+    def __init__(self):
+        self.devices = [{'name': 'pi-01', 'ip': '10.0.0.1'}]
+        self.statuses = [{'name': 'pi-01', 'ip': '10.0.0.1', 'status': 'online',
+                          'online': True, 'app_running': False}]
+        self._subscribers = []
+        self._sub_lock = threading.Lock()
+
+    def latest_statuses(self):
+        return self.statuses
+
+    # 與 DeviceMonitor 相同的訂閱上限邏輯
+    subscribe = web_common.DeviceMonitor.subscribe
+    unsubscribe = web_common.DeviceMonitor.unsubscribe
+
+
+class DevicesEtagTest(unittest.TestCase):
+
+    def setUp(self):
+        self.monitor = FakeMonitor()
+        app = create_app('web_common')
+        register_monitor_routes(app, self.monitor, 'viewer.html', 'test')
+        self.client = app.test_client()
+
+    def test_unchanged_devices_return_304(self):
+        first = self.client.get('/api/devices')
+        self.assertEqual(first.status_code, 200)
+        etag = first.headers['ETag']
+        self.assertIn('max-age=', first.headers['Cache-Control'])
+
+        again = self.client.get('/api/devices', headers={'If-None-Match': etag})
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.headers['ETag'], etag)
+        self.assertEqual(again.data, b'')
+
+    def test_changed_devices_return_new_body(self):
+        etag = self.client.get('/api/devices').headers['ETag']
+        self.monitor.statuses = [dict(self.monitor.statuses[0], status='running', app_running=True)]
+
+        changed = self.client.get('/api/devices', headers={'If-None-Match': etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers['ETag'], etag)
+        self.assertEqual(changed.json[0]['status'], 'running')
+
+    def test_stream_rejects_subscribers_over_limit(self):
+        for _ in range(MAX_SSE_SUBSCRIBERS):
+            self.assertIsNotNone(self.monitor.subscribe())
+        response = self.client.get('/api/devices/stream')
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response.headers)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,16 +3,113 @@
 """
 時數追蹤模組
 用於追蹤 Raspberry Pi 設備的運行、在線、離線時數
-(已加入線程安全鎖)
+(已加入線程安全的讀寫鎖)
 """
 
+import atexit
 import json
 import os
+import sys
 import time
 import threading
-from datetime import datetime, timedelta
+from bisect import bisect_left, bisect_right, insort
+from contextlib import contextmanager
+from functools import lru_cache
+from types import MappingProxyType
+from datetime import date, datetime, timedelta
 from collections import defaultdict
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
+
+try:
+    import orjson  # 可選：較快的 JSON 序列化/解析
+except ImportError:
+    orjson = None
+
+try:
+    import fcntl  # POSIX 檔案鎖：確保同一份數據檔只有一個行程寫入
+except ImportError:
+    fcntl = None
+
+# 完整快照的最短間隔 (秒)，其間只把變更追加到日誌檔，減少 SD 卡寫入量
+SNAPSHOT_INTERVAL = 3600
+# 快取的今日日期字串最長沿用時間 (秒)；系統時間校正 (如開機後 NTP 同步) 後最遲在此時間內跟上
+TODAY_RECHECK = 60
+# 自動保存：第一筆狀態轉換後等待此秒數再寫檔，期間的所有變更合併為一次寫入
+AUTOSAVE_DELAY = 60
+# 沒有狀態轉換時，持續累加的時數最長間隔此秒數寫入一次
+ACCRUAL_FLUSH_INTERVAL = 600
+
+# 狀態在統計總和中的位置 (running, online, offline)；未知狀態與原本相同計入離線
+_STATUS_INDEX = {'running': 0, 'online': 1, 'offline': 2}
+# 查詢未追蹤設備時使用的唯讀空累計時數 (避免 defaultdict 在讀取時新增記錄)
+_EMPTY_HISTORY = MappingProxyType({'running': 0.0, 'online': 0.0, 'offline': 0.0})
+
+
+def _dumps(data) -> bytes:
+    """序列化 JSON 為 UTF-8 bytes (優先使用 orjson，未安裝時退回標準 json 的 C 編碼器)"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False).encode('utf-8')
+
+
+def _loads(raw):
+    """解析 JSON (bytes 或 str)"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+@lru_cache(maxsize=4096)
+def _fmt_hms(total_seconds: int) -> str:
+    """整數秒數格式化為 HH:MM:SS (結果只取決於秒數，常見值重複出現，快取重用)"""
+    hours, rest = divmod(total_seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+
+class RWLock:
+    """
+    讀寫鎖：多個讀取者可同時持有，寫入者獨佔
+    有寫入者等待時新的讀取者會排隊，避免輪詢頻繁時寫入者飢餓 (不可重入)
+    """
+    
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+    
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        """取得讀取鎖"""
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+    
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        """取得寫入鎖"""
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
 
 class TimeTracker:
     """設備時數追蹤器 (Thread-Safe)"""
@@ -24,46 +121,88 @@ class TimeTracker:
         """
         self.data_file = data_file
         self.start_time = datetime.now()
-        self._lock = threading.RLock()  # 使用 RLock 允許同一線程多次獲取鎖
+        # 查詢 (儀表板/FineBI 輪詢) 遠多於狀態更新，讀取之間不互相阻塞
+        self._lock = RWLock()
+        self._save_lock = threading.Lock()  # 保存在讀取鎖下進行，另以此鎖避免同時寫同一個暫存檔
+        
+        # 設備設定版本號 (設定檔重新載入時遞增，供匯出模組判斷查找表是否需重建)
+        self.devices_version = 0
+        
+        # 自上次保存後是否有狀態轉換 (供自動保存判斷是否需要盡快寫檔)
+        # 同一狀態持續時的時數累加只記在 _dirty_devices / _dirty_records，不設定此旗標
+        self.dirty = False
         
-        # 當前狀態 {device_name: {'status': 'running/online/offline', 'since': datetime}}
+        # 增量保存：自上次保存後變更過的設備與 (日期, 設備)，只追加這些記錄到日誌檔
+        self.journal_file = os.path.splitext(data_file)[0] + ".journal"
+        self._dirty_devices = set()
+        self._dirty_records = set()
+        self._journal_seq = 0  # 日誌序號，快照記錄已包含到哪一筆，載入時略過較舊的日誌
+        self._last_snapshot = time.monotonic()
+        self._save_event = threading.Event()  # 有待保存的變更時設定，喚醒自動保存線程
+        
+        # 單一寫入者：控制介面與檢視器使用同一份數據檔，只有取得寫入鎖的行程保存快照與日誌
+        # (其餘行程唯讀，否則會互相刪除對方尚未寫入快照的日誌，且日誌序號各自遞增)
+        self._lock_file = None
+        self.read_only = not self._acquire_writer_lock()
+        
+        # 當前狀態 {device_name: {'status': 'running/online/offline', 'since': time.monotonic()}}
+        # 持續時間以單調時鐘計算，系統時間調整不會造成負值或跳動
         self.current_status = {}
         
-        # 累計時數 {device_name: {'running': timedelta, 'online': timedelta, 'offline': timedelta}}
+        # 累計時數 {device_name: {'running': seconds, 'online': seconds, 'offline': seconds}}
+        # 直接以秒數 (float) 累加，查詢與保存時不必再由 timedelta 換算
         self.history = defaultdict(lambda: {
-            'running': timedelta(),
-            'online': timedelta(),
-            'offline': timedelta()
+            'running': 0.0,
+            'online': 0.0,
+            'offline': 0.0
         })
         
         # 每日記錄 {date: {device_name: {'running': seconds, 'online': seconds, 'offline': seconds}}}
-        self.daily_records = defaultdict(lambda: defaultdict(lambda: {
-            'running': 0,
-            'online': 0,
-            'offline': 0
-        }))
+        # 使用一般 dict：只在每日第一次出現的 (日期, 設備) 建立記錄，之後的更新不經過 defaultdict 回呼
+        self.daily_records: Dict[str, Dict[str, Dict[str, float]]] = {}
+        # 每日記錄日期鍵的排序索引 ('YYYY-MM-DD' 字串順序即時間順序)，匯出時以二分搜尋取範圍
+        self._dates: List[str] = []
+        
+        # 週/月彙總 {週一日期 或 'YYYY-MM': {device_name: {'running': seconds, ...}}}
+        # 與每日記錄同步累加，查詢時不必重新掃描全部每日記錄
+        self._weekly: Dict[str, Dict[str, Dict[str, float]]] = {}
+        self._monthly: Dict[str, Dict[str, Dict[str, float]]] = {}
+        self._period_day = None   # _period_keys_today 對應的日期
+        self._period_keys_today = None
+        
+        # 今日日期字串快取，到午夜 (或 TODAY_RECHECK 秒) 前不必每次 strftime
+        self._today = ''
+        self._today_until = 0.0  # time.monotonic() 到期時間
         
         self.load_data()
         
+    def _acquire_writer_lock(self) -> bool:
+        """
+        取得數據檔的寫入鎖 (行程存活期間持有，結束時由系統釋放)
+        已被其他行程持有時回傳 False；不支援 fcntl 的平台不檢查
+        """
+        if fcntl is None:
+            return True
+        lock_file = open(f"{self.data_file}.lock", 'ab')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            print(f"⚠️  時數追蹤：{self.data_file} 已由其他行程寫入，本行程只統計不保存")
+            return False
+        self._lock_file = lock_file
+        return True
+    
     def load_data(self):
         """從文件載入歷史數據"""
-        with self._lock:
+        with self._lock.write():
             try:
                 if os.path.exists(self.data_file):
-                    with open(self.data_file, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
+                    with open(self.data_file, 'rb') as f:
+                        data = _loads(f.read())
                         
-                    # 載入累計時數
-                    if 'history' in data:
-                        for device, statuses in data['history'].items():
-                            for status, seconds in statuses.items():
-                                self.history[device][status] = timedelta(seconds=seconds)
-                    
-                    # 載入每日記錄
-                    if 'daily_records' in data:
-                        for date, devices in data['daily_records'].items():
-                            for device, statuses in devices.items():
-                                self.daily_records[date][device] = statuses
+                    self._apply_records(data)
+                    self._journal_seq = data.get('journal_seq', 0)
                                 
                     # 載入監控啟動時間
                     if 'start_time' in data:
@@ -75,69 +214,218 @@ class TimeTracker:
                     print(f"✅ 時數追蹤：已載入歷史數據")
             except Exception as e:
                 print(f"⚠️  時數追蹤：載入數據失敗 - {e}")
+            
+            self._replay_journal()
+            self._rebuild_periods()
+    
+    def _apply_records(self, data: Dict):
+        """
+        將快照或日誌中的累計時數與每日記錄寫入記憶體 (以檔案中的值覆蓋)
+        設備名稱、日期與狀態鍵以 sys.intern 共用同一個字串物件 (每天每台設備都會重複出現)
+        """
+        intern = sys.intern
+        # 載入累計時數
+        for device, statuses in data.get('history', {}).items():
+            device_history = self.history[intern(device)]
+            for status, seconds in statuses.items():
+                device_history[intern(status)] = float(seconds)
+        
+        # 載入每日記錄
+        for day_str, devices in data.get('daily_records', {}).items():
+            day = self.daily_records.setdefault(intern(day_str), {})
+            for device, statuses in devices.items():
+                day[intern(device)] = {intern(status): seconds for status, seconds in statuses.items()}
+    
+    def _replay_journal(self):
+        """重播快照之後追加的日誌 (每行一筆；斷電造成的殘缺行直接略過)"""
+        try:
+            with open(self.journal_file, 'rb') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            print(f"⚠️  時數追蹤：讀取日誌失敗 - {e}")
+            return
+        
+        replayed = 0
+        for line in lines:
+            try:
+                entry = _loads(line)
+            except ValueError:
+                continue
+            if entry.get('seq', 0) <= self._journal_seq:
+                continue  # 已包含在快照中
+            self._apply_records(entry)
+            self._journal_seq = entry['seq']
+            replayed += 1
+        if replayed:
+            # 重播的內容尚未寫入快照
+            self.dirty = True
+            self._save_event.set()
+            print(f"✅ 時數追蹤：已重播 {replayed} 筆增量記錄")
     
     def save_data(self):
-        """保存數據到文件 (Thread-Safe)"""
-        with self._lock:
+        """保存數據到文件 (Thread-Safe，只需讀取鎖，寫檔期間查詢不受影響；唯讀時不寫檔)"""
+        if self.read_only:
+            return False
+        with self._save_lock, self._lock.read():
             try:
-                # 準備要保存的數據結構
-                data = {
+                # 最外層只引用來源資料 (每日記錄不另建複本)，一次序列化後整塊寫入
+                # (不使用 json.dump 與 indent，兩者皆會退回純 Python 編碼器)
+                payload = _dumps({
                     'start_time': self.start_time.isoformat(),
                     'last_save': datetime.now().isoformat(),
-                    'history': {
-                        device: {
-                            status: td.total_seconds()
-                            for status, td in statuses.items()
-                        }
-                        for device, statuses in self.history.items()
-                    },
-                    'daily_records': dict(self.daily_records)
-                }
+                    'journal_seq': self._journal_seq,
+                    'history': self.history,
+                    'daily_records': self.daily_records
+                })
                 
                 # 使用臨時文件進行原子寫入，防止寫入中斷導致文件損壞
                 temp_file = f"{self.data_file}.tmp"
-                with open(temp_file, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, indent=2, ensure_ascii=False)
+                with open(temp_file, 'wb') as f:
+                    f.write(payload)
                 
                 # 寫入成功後替換原文件
                 os.replace(temp_file, self.data_file)
+                self.dirty = False
+                self._dirty_devices.clear()
+                self._dirty_records.clear()
+                self._last_snapshot = time.monotonic()
+                
+                # 快照已包含所有日誌內容 (即使刪除前中斷，載入時也會依序號略過)
+                try:
+                    os.remove(self.journal_file)
+                except FileNotFoundError:
+                    pass
                     
                 return True
             except Exception as e:
                 print(f"⚠️  時數追蹤：保存數據失敗 - {e}")
                 return False
     
+    def save_incremental(self):
+        """
+        增量保存：只把上次保存後變更的記錄追加到日誌檔
+        距離上次完整快照超過 SNAPSHOT_INTERVAL 時改為寫完整快照 (並清空日誌)
+        """
+        if self.read_only:
+            return False
+        if time.monotonic() - self._last_snapshot >= SNAPSHOT_INTERVAL:
+            return self.save_data()
+        
+        with self._save_lock, self._lock.read():
+            if not self._dirty_devices and not self._dirty_records:
+                self.dirty = False
+                return True
+            try:
+                daily = {}
+                for day, device in self._dirty_records:
+                    daily.setdefault(day, {})[device] = self.daily_records[day][device]
+                entry = {
+                    'seq': self._journal_seq + 1,
+                    'history': {device: self.history[device] for device in self._dirty_devices},
+                    'daily_records': daily
+                }
+                
+                with open(self.journal_file, 'ab') as f:
+                    f.write(_dumps(entry) + b'\n')
+                
+                self._journal_seq += 1
+                self.dirty = False
+                self._dirty_devices.clear()
+                self._dirty_records.clear()
+                return True
+            except Exception as e:
+                print(f"⚠️  時數追蹤：增量保存失敗 - {e}")
+                return False
+    
     def update_status(self, device_name: str, new_status: str):
         """
         更新設備狀態並計算時數
         :param device_name: 設備名稱
         :param new_status: 新狀態 ('running', 'online', 'offline')
         """
-        with self._lock:
-            now = datetime.now()
-            today = now.strftime('%Y-%m-%d')
+        device_name = sys.intern(device_name)
+        with self._lock.write():
+            now = time.monotonic()
+            if now >= self._today_until:
+                self._refresh_today(now)
+            today = self._today
             
             # 如果設備有舊狀態，計算持續時間
-            if device_name in self.current_status:
-                old_status = self.current_status[device_name]['status']
-                since = self.current_status[device_name]['since']
-                duration = now - since
-                
-                # 防止時間倒流（系統時間變更時可能發生）
-                if duration.total_seconds() < 0:
-                    duration = timedelta(0)
+            entry = self.current_status.get(device_name)
+            transition = entry is None or entry['status'] != new_status
+            if entry is not None:
+                old_status = entry['status']
+                duration = now - entry['since']
                 
                 # 更新累計時數
                 self.history[device_name][old_status] += duration
                 
                 # 更新每日記錄
-                self.daily_records[today][device_name][old_status] += duration.total_seconds()
+                day = self.daily_records.get(today)
+                if day is None:
+                    day = self.daily_records[today] = {}
+                    insort(self._dates, today)
+                bucket = day.get(device_name)
+                if bucket is None:
+                    bucket = day[device_name] = {'running': 0, 'online': 0, 'offline': 0}
+                bucket[old_status] += duration
+                self._dirty_devices.add(device_name)
+                self._dirty_records.add((today, device_name))
+                
+                # 同步累加本週與本月彙總
+                if today != self._period_day:
+                    self._period_day = today
+                    self._period_keys_today = self._period_keys(today)
+                week_key, month_key = self._period_keys_today
+                self._accumulate(self._weekly, week_key, device_name, old_status, duration)
+                self._accumulate(self._monthly, month_key, device_name, old_status, duration)
             
             # 記錄新狀態
             self.current_status[device_name] = {
                 'status': new_status,
                 'since': now
             }
+            if transition and not self.dirty:
+                # 只有狀態轉換才標記並喚醒自動保存線程 (輪詢時時數每次都會增加，不能以此判斷)；
+                # 自上次保存後的第一筆轉換才需喚醒
+                self.dirty = True
+                self._save_event.set()
+    
+    def _refresh_today(self, mono: float):
+        """更新今日日期字串快取，到期時間為下一個午夜與 TODAY_RECHECK 秒後兩者較早者"""
+        wall = datetime.now()
+        midnight = (wall + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        self._today = sys.intern(wall.strftime('%Y-%m-%d'))
+        self._today_until = mono + min((midnight - wall).total_seconds(), TODAY_RECHECK)
+    
+    def start_autosave(self, delay: float = AUTOSAVE_DELAY) -> Optional[threading.Thread]:
+        """
+        啟動自動保存線程：狀態轉換時喚醒，等待 delay 秒合併期間的變更後增量保存；
+        沒有轉換時每 ACCRUAL_FLUSH_INTERVAL 秒寫入累加中的時數 (無待寫入記錄則略過)
+        (平時只追加日誌，每 SNAPSHOT_INTERVAL 秒寫一次完整快照)；程式結束時同步寫入完整快照
+        唯讀 (未取得寫入鎖) 時不啟動，回傳 None
+        """
+        if self.read_only:
+            return None
+        def autosave_loop():
+            while True:
+                if self._save_event.wait(ACCRUAL_FLUSH_INTERVAL):
+                    time.sleep(delay)
+                elif not self._dirty_records:
+                    continue
+                # 先清除再保存：保存期間之後的變更會重新設定事件
+                self._save_event.clear()
+                if self.save_incremental():
+                    print(f"💾 自動保存 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        
+        thread = threading.Thread(target=autosave_loop, name='time-tracker-save', daemon=True)
+        thread.start()
+        
+        # 程式結束時再保存一次，避免遺失最後一段時數
+        atexit.register(self.save_data)
+        return thread
     
     def get_device_stats(self, device_name: str) -> Dict:
         """
@@ -145,180 +433,226 @@ class TimeTracker:
         :param device_name: 設備名稱
         :return: 統計數據字典
         """
-        with self._lock:
-            # 計算當前狀態的持續時間
-            current_duration = timedelta()
-            current_status = 'offline'
-            
-            if device_name in self.current_status:
-                current_status = self.current_status[device_name]['status']
-                since = self.current_status[device_name]['since']
-                current_duration = datetime.now() - since
-                if current_duration.total_seconds() < 0:
-                    current_duration = timedelta(0)
-            
-            # 複製累計時數（避免修改原始數據）
-            # 注意：這裡使用 .get() 防止 KeyError，雖然 defaultdict 會處理，但安全第一
-            device_history = self.history[device_name]
-            total_running = device_history['running']
-            total_online = device_history['online']
-            total_offline = device_history['offline']
-            
-            # 將當前正在進行的時數加到顯示數據中（不存入歷史，直到狀態改變）
-            if current_status == 'running':
-                total_running += current_duration
-            elif current_status == 'online':
-                total_online += current_duration
-            else:
-                total_offline += current_duration
-            
-            return {
-                'running': self._format_timedelta(total_running),
-                'online': self._format_timedelta(total_online),
-                'offline': self._format_timedelta(total_offline),
-                'running_seconds': total_running.total_seconds(),
-                'online_seconds': total_online.total_seconds(),
-                'offline_seconds': total_offline.total_seconds(),
-                'current_status': current_status,
-                'current_duration': self._format_timedelta(current_duration)
-            }
+        with self._lock.read():
+            return self._device_stats(device_name, time.monotonic())
+    
+    def _device_stats(self, device_name: str, now: float) -> Dict:
+        """
+        計算設備統計數據 (呼叫端需持有讀取鎖；讀寫鎖不可重入)
+        :param now: 計算當前狀態持續時間的基準時間 (time.monotonic())，批次查詢時共用同一個時間點
+        """
+        # 計算當前狀態的持續時間 (秒)
+        current_duration = 0.0
+        current_status = 'offline'
+        
+        entry = self.current_status.get(device_name)
+        if entry is not None:
+            current_status = entry['status']
+            current_duration = now - entry['since']
+        
+        # 使用 .get()：查詢未知設備時不可經由 defaultdict 新增記錄 (讀取鎖下不得修改數據)
+        device_history = self.history.get(device_name, _EMPTY_HISTORY)
+        totals = [device_history['running'], device_history['online'], device_history['offline']]
+        
+        # 將當前正在進行的時數加到顯示數據中（不存入歷史，直到狀態改變）
+        totals[_STATUS_INDEX.get(current_status, 2)] += current_duration
+        total_running, total_online, total_offline = totals
+        
+        return {
+            'running': self._format_seconds(total_running),
+            'online': self._format_seconds(total_online),
+            'offline': self._format_seconds(total_offline),
+            'running_seconds': total_running,
+            'online_seconds': total_online,
+            'offline_seconds': total_offline,
+            'current_status': current_status,
+            'current_duration': self._format_seconds(current_duration)
+        }
     
     def get_all_daily_records(self) -> Dict:
         """獲取所有每日記錄 (Thread-Safe) - 供 FineBI 報表使用"""
-        with self._lock:
-            # 回傳深拷貝，避免外部修改影響內部數據
-            return json.loads(json.dumps(self.daily_records))
+        with self._lock.read():
+            # 回傳複本，避免外部修改影響內部數據 (最內層只有數值，逐層複製即可，不必經過 JSON 編解碼)
+            return {
+                day: {device: dict(statuses) for device, statuses in devices.items()}
+                for day, devices in self.daily_records.items()
+            }
 
     def get_all_devices_stats(self) -> Dict:
-        """獲取所有設備的統計數據"""
-        with self._lock:
+        """獲取所有設備的統計數據 (整個迭代只持有一次讀取鎖)"""
+        with self._lock.read():
             # 獲取所有已知設備（包括歷史記錄中的和當前在線的）
-            all_devices = set(self.current_status.keys()) | set(self.history.keys())
+            all_devices = self.current_status.keys() | self.history.keys()
+            # 所有設備以同一時間點計算，彼此一致
+            now = time.monotonic()
             return {
-                device: self.get_device_stats(device)
+                device: self._device_stats(device, now)
                 for device in all_devices
             }
     
     def get_daily_stats(self, date: str = None) -> Dict:
         """獲取指定日期的統計"""
-        with self._lock:
+        with self._lock.read():
             if date is None:
                 date = datetime.now().strftime('%Y-%m-%d')
             return dict(self.daily_records.get(date, {}))
     
     def get_weekly_stats(self) -> Dict:
         """獲取本周統計"""
-        with self._lock:
-            today = datetime.now()
-            week_start = today - timedelta(days=today.weekday())
-            
-            weekly_data = defaultdict(lambda: {'running': 0, 'online': 0, 'offline': 0})
-            
-            for i in range(7):
-                date = (week_start + timedelta(days=i)).strftime('%Y-%m-%d')
-                if date in self.daily_records:
-                    for device, statuses in self.daily_records[date].items():
-                        for status, seconds in statuses.items():
-                            weekly_data[device][status] += seconds
-            
-            return dict(weekly_data)
+        week_key, _ = self._period_keys(datetime.now().strftime('%Y-%m-%d'))
+        with self._lock.read():
+            return self._copy_period(self._weekly, week_key)
     
     def get_monthly_stats(self, year: int = None, month: int = None) -> Dict:
         """獲取指定月份的統計"""
-        with self._lock:
-            if year is None or month is None:
-                today = datetime.now()
-                year = today.year
-                month = today.month
-            
-            month_start = datetime(year, month, 1)
-            if month == 12:
-                month_end = datetime(year + 1, 1, 1)
-            else:
-                month_end = datetime(year, month + 1, 1)
-            
-            monthly_data = defaultdict(lambda: {'running': 0, 'online': 0, 'offline': 0})
-            
-            for date_str, devices in self.daily_records.items():
-                try:
-                    date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-                    if month_start <= date_obj < month_end:
-                        for device, statuses in devices.items():
-                            for status, seconds in statuses.items():
-                                monthly_data[device][status] += seconds
-                except ValueError:
-                    continue
-            
-            return dict(monthly_data)
+        if year is None or month is None:
+            today = datetime.now()
+            year = today.year
+            month = today.month
+        
+        with self._lock.read():
+            return self._copy_period(self._monthly, f"{year:04d}-{month:02d}")
+    
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _period_keys(date_str: str):
+        """
+        每日記錄的日期字串轉為 (週彙總鍵, 月彙總鍵)
+        週鍵為該週週一的日期，月鍵為 'YYYY-MM'；日期格式不正確時拋出 ValueError
+        (以 date.fromisoformat 與序數運算取代 strptime，結果依日期快取)
+        """
+        day = date.fromisoformat(date_str)
+        week_start = date.fromordinal(day.toordinal() - day.weekday())
+        return week_start.isoformat(), date_str[:7]
+    
+    @staticmethod
+    def _accumulate(table: Dict, key: str, device_name: str, status: str, seconds: float):
+        """將秒數累加到週/月彙總"""
+        devices = table.get(key)
+        if devices is None:
+            devices = table[key] = {}
+        bucket = devices.get(device_name)
+        if bucket is None:
+            bucket = devices[device_name] = {'running': 0, 'online': 0, 'offline': 0}
+        bucket[status] = bucket.get(status, 0) + seconds
+    
+    @staticmethod
+    def _copy_period(table: Dict, key: str) -> Dict:
+        """回傳彙總的複本 (避免外部修改影響內部數據)"""
+        return {device: dict(statuses) for device, statuses in table.get(key, {}).items()}
+    
+    def _rebuild_periods(self):
+        """由每日記錄重建週/月彙總與日期索引 (載入後呼叫；呼叫端需持有寫入鎖)"""
+        self._dates = sorted(self.daily_records)
+        self._weekly.clear()
+        self._monthly.clear()
+        for date_str, devices in self.daily_records.items():
+            try:
+                week_key, month_key = self._period_keys(date_str)
+            except ValueError:
+                continue
+            for device, statuses in devices.items():
+                for status, seconds in statuses.items():
+                    self._accumulate(self._weekly, week_key, device, status, seconds)
+                    self._accumulate(self._monthly, month_key, device, status, seconds)
     
     def get_uptime(self) -> str:
         """獲取監控系統運行時間"""
         uptime = datetime.now() - self.start_time
         return self._format_timedelta(uptime)
     
+    def get_uptime_seconds(self) -> float:
+        """獲取監控系統運行秒數 (供前端自行計時)"""
+        return (datetime.now() - self.start_time).total_seconds()
+    
     def get_start_time(self) -> str:
         """獲取監控啟動時間"""
         return self.start_time.strftime('%Y-%m-%d %H:%M:%S')
     
-    def export_to_csv(self, date_range: str = 'all') -> str:
-        """導出數據為 CSV 格式"""
+    def export_to_csv(self, date_range: str = 'all') -> Iterator[str]:
+        """
+        導出數據為 CSV 格式，逐列產生文字 (可直接作為串流 HTTP 回應)
+        呼叫時即在讀取鎖下取得資料快照，之後產生內容時不持有鎖
+        """
+        rows = self._csv_rows(date_range)
+        return self._iter_csv(rows)
+    
+    def export_to_csv_string(self, date_range: str = 'all') -> str:
+        """導出數據為完整的 CSV 字串"""
+        return ''.join(self.export_to_csv(date_range))
+    
+    @staticmethod
+    def _iter_csv(rows: List) -> Iterator[str]:
+        """將 (設備, 日期, 統計) 快照逐列格式化為 CSV 文字"""
         import csv
         from io import StringIO
         
-        with self._lock:
-            output = StringIO()
-            writer = csv.writer(output)
-            
-            # 寫入標題
-            writer.writerow(['設備名稱', '日期', '運行時數', '在線時數', '離線時數', '總時數'])
+        buffer = StringIO()
+        writer = csv.writer(buffer)
+        
+        def line(row) -> str:
+            writer.writerow(row)
+            text = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            return text
+        
+        # 寫入標題
+        yield line(['設備名稱', '日期', '運行時數', '在線時數', '離線時數', '總時數'])
+        
+        for device, day, stats in rows:
+            running_hours = stats['running'] / 3600
+            online_hours = stats['online'] / 3600
+            offline_hours = stats['offline'] / 3600
+            total_hours = running_hours + online_hours + offline_hours
             
-            # 根據範圍選擇數據
+            yield line([
+                device,
+                day,
+                f"{running_hours:.2f}",
+                f"{online_hours:.2f}",
+                f"{offline_hours:.2f}",
+                f"{total_hours:.2f}"
+            ])
+    
+    def _csv_rows(self, date_range: str) -> List:
+        """在讀取鎖下取出匯出範圍內的 (設備, 日期, 統計複本)"""
+        with self._lock.read():
+            # 根據範圍選擇數據 (由排序索引直接切出範圍內有記錄的日期)
+            today = datetime.now()
             if date_range == 'today':
-                dates = [datetime.now().strftime('%Y-%m-%d')]
+                day = today.strftime('%Y-%m-%d')
+                dates = self._dates_between(day, day)
             elif date_range == 'week':
-                today = datetime.now()
                 week_start = today - timedelta(days=today.weekday())
-                dates = [(week_start + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(7)]
+                dates = self._dates_between(week_start.strftime('%Y-%m-%d'),
+                                            (week_start + timedelta(days=6)).strftime('%Y-%m-%d'))
             elif date_range == 'month':
-                today = datetime.now()
-                month_start = today.replace(day=1)
-                dates = []
-                current = month_start
-                while current.month == today.month:
-                    dates.append(current.strftime('%Y-%m-%d'))
-                    current += timedelta(days=1)
+                month_key = today.strftime('%Y-%m')
+                dates = self._dates_between(f"{month_key}-01", f"{month_key}-31")
             else:  # all
-                dates = sorted(self.daily_records.keys())
+                dates = self._dates
             
-            # 寫入數據
-            for date in dates:
-                if date in self.daily_records:
-                    for device, stats in self.daily_records[date].items():
-                        running_hours = stats['running'] / 3600
-                        online_hours = stats['online'] / 3600
-                        offline_hours = stats['offline'] / 3600
-                        total_hours = running_hours + online_hours + offline_hours
-                        
-                        writer.writerow([
-                            device,
-                            date,
-                            f"{running_hours:.2f}",
-                            f"{online_hours:.2f}",
-                            f"{offline_hours:.2f}",
-                            f"{total_hours:.2f}"
-                        ])
-            
-            return output.getvalue()
+            # 統計只含數值，複製一層即可安全地在鎖外使用
+            return [
+                (device, day, dict(stats))
+                for day in dates
+                for device, stats in self.daily_records[day].items()
+            ]
+    
+    def _dates_between(self, first: str, last: str) -> List[str]:
+        """取出 first ~ last (含) 之間有每日記錄的日期，依時間排序"""
+        return self._dates[bisect_left(self._dates, first):bisect_right(self._dates, last)]
     
     def reset_stats(self, device_name: str = None):
         """重置統計數據"""
-        with self._lock:
+        with self._lock.write():
             if device_name:
                 if device_name in self.history:
                     self.history[device_name] = {
-                        'running': timedelta(),
-                        'online': timedelta(),
-                        'offline': timedelta()
+                        'running': 0.0,
+                        'online': 0.0,
+                        'offline': 0.0
                     }
                 if device_name in self.current_status:
                     del self.current_status[device_name]
@@ -326,17 +660,24 @@ class TimeTracker:
                 self.history.clear()
                 self.current_status.clear()
                 self.daily_records.clear()
+                self._dates.clear()
+                self._weekly.clear()
+                self._monthly.clear()
+                self._dirty_devices.clear()
+                self._dirty_records.clear()
                 self.start_time = datetime.now()
-            
-            self.save_data()
+        
+        # 保存需取得讀取鎖，須在釋放寫入鎖之後
+        self.save_data()
     
     def _format_timedelta(self, td: timedelta) -> str:
         """格式化時間差為 HH:MM:SS"""
-        total_seconds = int(td.total_seconds())
-        hours = total_seconds // 3600
-        minutes = (total_seconds % 3600) // 60
-        seconds = total_seconds % 60
-        return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+        return self._format_seconds(td.total_seconds())
+    
+    @staticmethod
+    def _format_seconds(seconds: float) -> str:
+        """格式化秒數為 HH:MM:SS"""
+        return _fmt_hms(int(seconds))
     
     def _format_hours(self, seconds: float) -> str:
         """格式化秒數為小時（保留2位小數）"""
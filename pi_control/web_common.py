@@ -0,0 +1,481 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Web 共用模組
+控制介面 (main_new.py) 與監控檢視器 (main_viewer.py) 共用的 JSON 回應、靜態檔快取、
+設備狀態輪詢與 SSE 推送，兩者只在設備操作與頁面上有所不同
+"""
+
+import atexit
+import gzip
+import hashlib
+import json
+import os
+import queue
+import shlex
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional
+
+import paramiko
+from flask import Flask, Response, current_app, make_response, render_template, request, url_for
+from jinja2 import FileSystemBytecodeCache
+
+try:
+    import orjson  # 可選：較快的 JSON 解析
+except ImportError:
+    orjson = None
+
+try:
+    from flask_compress import Compress  # 可選：回應壓縮 (br/gzip)
+except ImportError:
+    Compress = None
+
+# 導入時數追蹤模組
+from time_tracker import TimeTracker
+# 導入數據匯出模組
+from data_exporter import DataExporter
+# 導入 SSH 連線池模組
+from ssh_pool import SSHPool, fast_transport, tcp_probe
+
+# 未安裝 flask-compress 時，超過此大小的 JSON 回應自行以 gzip 壓縮
+GZIP_MIN_SIZE = 1024
+
+# 設備狀態快取有效時間 (秒)，多個頁面同時輪詢時避免重複 SSH 探測
+STATUS_CACHE_TTL = 2.5
+# 背景輪詢設備狀態的間隔 (秒)
+STATUS_POLL_INTERVAL = 10
+# 每隔幾次輪詢推送一次全部設備 (約 30 秒)，讓狀態不變的設備時數也能更新
+FULL_PUSH_EVERY = 3
+# 連續離線達此次數後開始退避：跳過探測的時間自 10 秒起倍增，最長 5 分鐘
+OFFLINE_BACKOFF_AFTER = 3
+OFFLINE_BACKOFF_MIN = 10
+OFFLINE_BACKOFF_MAX = 300
+
+# 伺服器工作線程數 (waitress 與 gunicorn_conf.py 一致)
+SERVER_THREADS = 32
+# SSE 長連線會一直佔用一條工作線程，同時訂閱數設上限，保留其餘線程給一般 API 請求
+# (超過上限的分頁收到 503，前端改以 /api/devices 定時輪詢)
+MAX_SSE_SUBSCRIBERS = 8
+
+
+def dumps_json(data) -> bytes:
+    """序列化 JSON (優先使用 orjson，未安裝時退回標準 json)"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def ojson(data) -> Response:
+    """JSON 回應 (取代 jsonify，序列化較快)"""
+    return json_response(dumps_json(data))
+
+
+def json_response(body: bytes) -> Response:
+    """以已序列化的 JSON 建立回應 (必要時 gzip 壓縮)"""
+    response = Response(body, mimetype='application/json')
+    if Compress is None and len(body) >= GZIP_MIN_SIZE:
+        # level 1 壓縮成本低，對重複性高的設備 JSON 仍有數倍壓縮率
+        response.vary.add('Accept-Encoding')
+        if 'gzip' in request.accept_encodings:
+            response.set_data(gzip.compress(body, compresslevel=1))
+            response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+
+def _file_hash(path: str) -> str:
+    """檔案內容的短雜湊 (作為 ETag / 靜態檔版本號)"""
+    with open(path, 'rb') as f:
+        return hashlib.blake2b(f.read(), digest_size=8).hexdigest()
+
+
+# 靜態檔版本號 {filename: hash}，網址帶上版本後可讓瀏覽器長期快取
+_STATIC_VERSIONS = {}
+
+
+def static_url(filename: str) -> str:
+    """靜態檔案網址 (附內容雜湊，檔案更新後網址隨之改變)"""
+    version = _STATIC_VERSIONS.get(filename)
+    if version is None:
+        version = _STATIC_VERSIONS[filename] = _file_hash(os.path.join(current_app.static_folder, filename))
+    return url_for('static', filename=filename, v=version)
+
+
+def _cache_static(response):
+    """靜態檔網址已含版本號，可放心讓瀏覽器快取"""
+    if request.path.startswith(current_app.static_url_path + '/'):
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+
+def create_app(import_name: str) -> Flask:
+    """建立 Flask 應用程式並套用共用設定 (模板快取、靜態檔快取、回應壓縮)"""
+    app = Flask(import_name)
+    # 頁面模板位於 templates/，編譯結果以 bytecode 快取保存，重啟後不必重新編譯
+    jinja_cache_dir = os.path.join(app.root_path, '.jinja_cache')
+    os.makedirs(jinja_cache_dir, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(jinja_cache_dir)
+    app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 86400  # 靜態檔案讓瀏覽器快取 1 天
+    if Compress:
+        app.config.update(COMPRESS_ALGORITHM=['br', 'gzip'], COMPRESS_BR_LEVEL=5)
+        Compress(app)
+
+    app.json.compact = True  # 其餘經由 Flask 輸出的 JSON 也使用緊湊格式
+    app.jinja_env.globals['static_url'] = static_url
+    app.after_request(_cache_static)
+    return app
+
+
+def page_etag(app: Flask, template: str, *static_files: str) -> str:
+    """主頁面的 ETag 基礎：模板與其引用的 CSS/JS 任一變更都會改變 (不變時瀏覽器可直接 304)"""
+    template_dir = os.path.join(app.root_path, app.template_folder)
+    return '-'.join(
+        [_file_hash(os.path.join(template_dir, name)) for name in ('base.html', template)]
+        + [_file_hash(os.path.join(app.static_folder, name)) for name in static_files]
+    )
+
+
+class DeviceCtx(NamedTuple):
+    """設備的預先組好的遠端指令 (載入設定檔時建立，避免每次查詢重新組字串)"""
+    pgrep_cmd: str      # 檢查程式是否運行
+    script_name: str
+
+
+class DeviceMonitor:
+    """設備狀態監控 (背景輪詢、狀態快取、時數追蹤與 SSE 推送)"""
+
+    def __init__(self, config_file: str = "hosts.json"):
+        self.config_file = config_file
+        self._cfg_mtime = None  # 設定檔上次載入時的修改時間
+        self._ctx: Dict[str, DeviceCtx] = {}  # {device_name: DeviceCtx}
+        self.device_by_name: Dict[str, Dict] = {}  # {device_name: device}，操作 API 以名稱查找設備
+        self.devices = self.load_config()
+
+        # 整合時數追蹤器
+        self.time_tracker = TimeTracker()
+
+        # 初始化數據匯出器
+        self.exporter = DataExporter()
+
+        # SSH 連線池 (重用已認證的連線)
+        self.pool = SSHPool(self.connect_ssh)
+
+        # 狀態查詢共用線程池 (各設備並行探測)，整個程序生命週期只建立一次
+        self.status_executor = ThreadPoolExecutor(max_workers=min(32, max(1, len(self.devices) * 2)),
+                                                  thread_name_prefix='rpi-poll')
+        # 結束時不等待卡住的 SSH 探測，並關閉連線池內的連線
+        atexit.register(self.status_executor.shutdown, wait=False, cancel_futures=True)
+        atexit.register(self.pool.close_all)
+
+        # 設備狀態快取 {device_name: (monotonic_time, result)}
+        self._status_cache = {}
+        self._status_lock = threading.Lock()
+        # 離線退避 {device_name: (連續離線次數, 下次探測的 monotonic 時間)}
+        self._offline: Dict[str, tuple] = {}
+
+        # 全部設備的狀態快照 (monotonic_time, results)；同時間的多個請求只觸發一次探測
+        self._snapshot = (0.0, None)
+        self._snapshot_lock = threading.Lock()
+
+        # SSE 訂閱者 (每個連線一個 Queue)
+        self._subscribers: List[queue.Queue] = []
+        self._sub_lock = threading.Lock()
+        self._last_states: Dict[str, tuple] = {}
+
+        # 啟動自動保存線程
+        self.start_auto_save()
+
+        # 背景並行預先建立各設備的 SSH 連線，第一次查詢狀態時不必等待握手
+        for device in self.devices:
+            self.status_executor.submit(self.pool.warm, device)
+
+        # 常駐背景輪詢線程：HTTP 請求只讀取最新結果，不再同步等待 SSH
+        self._poller = threading.Thread(target=self._poll_loop, name='rpi-poller', daemon=True)
+        self._poller.start()
+
+    def _read_config(self) -> List[Dict]:
+        """讀取並解析設定檔，同時記錄其修改時間"""
+        mtime = os.stat(self.config_file).st_mtime_ns
+        with open(self.config_file, 'rb') as f:
+            raw = f.read()
+        devices = orjson.loads(raw) if orjson else json.loads(raw)
+        self._ctx = {d['name']: self._build_ctx(d) for d in devices}
+        self.device_by_name = {d['name']: d for d in devices}
+        self._cfg_mtime = mtime
+        return devices
+
+    @classmethod
+    def _build_ctx(cls, device: Dict) -> DeviceCtx:
+        """依設備設定預先組好 pgrep 指令 (子類別可擴充為含操作指令的 ctx)"""
+        return DeviceCtx(
+            pgrep_cmd=f"pgrep -f {shlex.quote(device.get('process_keyword', 'pdf_viewer'))}",
+            script_name=device.get('script_path', '').split('/')[-1],
+        )
+
+    def _device_ctx(self, device: Dict):
+        """取得設備的預組指令 (不在設定檔中的設備臨時建立)"""
+        ctx = self._ctx.get(device['name'])
+        if ctx is None:
+            ctx = self._ctx[device['name']] = self._build_ctx(device)
+        return ctx
+
+    def load_config(self) -> List[Dict]:
+        """載入設備配置"""
+        try:
+            return self._read_config()
+        except (OSError, ValueError) as e:
+            print(f"⚠️  載入設定檔失敗 - {e}")
+            return []
+
+    def reload_config(self) -> Dict:
+        """重新載入配置並返回結果 (設定檔未修改時不重新解析)"""
+        try:
+            if os.stat(self.config_file).st_mtime_ns == self._cfg_mtime:
+                return {'success': True, 'message': f'設定檔未變更，共 {len(self.devices)} 台設備'}
+            self.devices = self._read_config()
+            self.time_tracker.devices_version += 1
+            return {'success': True, 'message': f'已重新載入 {len(self.devices)} 台設備'}
+        except (OSError, ValueError) as e:
+            return {'success': False, 'message': f'設定檔錯誤: {str(e)}'}
+
+    def start_auto_save(self):
+        """啟動時數自動保存 (由 TimeTracker 的保存線程依變更觸發) 與閒置 SSH 連線清理線程"""
+        self.time_tracker.start_autosave()
+
+        def sweep_pool():
+            while True:
+                time.sleep(30)
+                self.pool.sweep()
+
+        thread = threading.Thread(target=sweep_pool, name='ssh-sweep', daemon=True)
+        thread.start()
+
+    def connect_ssh(self, device: Dict, timeout: int = 10) -> Optional[paramiko.SSHClient]:
+        """建立 SSH 連接"""
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        try:
+            client.connect(
+                hostname=device['ip'],
+                username=device['user'],
+                password=device['password'],
+                timeout=timeout,
+                banner_timeout=30,
+                # 僅使用密碼驗證，跳過 agent 與本機金鑰的逐一嘗試
+                allow_agent=False,
+                look_for_keys=False,
+                transport_factory=fast_transport
+            )
+            return client
+        except:
+            return None
+
+    def check_online(self, device: Dict) -> bool:
+        """檢查設備是否在線 (直接探測 SSH 端口，不再 fork ping 子程序)"""
+        return tcp_probe(device['ip'])
+
+    @staticmethod
+    def _pgrep_once(client: paramiko.SSHClient, pgrep_cmd: str, timeout: Optional[float] = None) -> bool:
+        """在既有的 SSH 連線上執行一次 pgrep，回傳程式是否運行"""
+        stdin, stdout, stderr = client.exec_command(pgrep_cmd, timeout=timeout)
+        return bool(stdout.read().strip())
+
+    def get_all_statuses(self) -> List[Dict]:
+        """並行獲取所有設備狀態 (快照有效期間內直接回傳；並發請求等待同一次探測結果)"""
+        with self._snapshot_lock:
+            ts, results = self._snapshot
+            if results is not None and time.monotonic() - ts < STATUS_CACHE_TTL:
+                return results
+            results = list(self.status_executor.map(self.get_device_status, self.devices))
+            self._snapshot = (time.monotonic(), results)
+            return results
+
+    def latest_statuses(self) -> List[Dict]:
+        """回傳背景輪詢的最新結果 (不檢查 TTL)，只有尚無結果的設備才即時探測"""
+        with self._status_lock:
+            latest = {name: entry[1] for name, entry in self._status_cache.items()}
+        missing = [device for device in self.devices if device['name'] not in latest]
+        for result in self.status_executor.map(self.get_device_status, missing):
+            latest[result['name']] = result
+        return [latest[device['name']] for device in self.devices]
+
+    def subscribe(self) -> Optional[queue.Queue]:
+        """註冊 SSE 訂閱者，已達 MAX_SSE_SUBSCRIBERS 時回傳 None"""
+        q = queue.Queue()
+        with self._sub_lock:
+            if len(self._subscribers) >= MAX_SSE_SUBSCRIBERS:
+                return None
+            self._subscribers.append(q)
+        return q
+
+    def unsubscribe(self, q: queue.Queue):
+        """移除 SSE 訂閱者"""
+        with self._sub_lock:
+            if q in self._subscribers:
+                self._subscribers.remove(q)
+
+    def _poll_loop(self):
+        """
+        共用輪詢：固定間隔探測所有設備更新快取，只把狀態有變化的設備推送給訂閱者
+        每 FULL_PUSH_EVERY 次輪詢改推送完整結果，狀態未變的設備時數才不會停在舊值
+        """
+        polls = 0
+        while True:
+            try:
+                results = self.get_all_statuses()
+            except Exception as e:
+                print(f"⚠️ 背景輪詢失敗: {e}")
+                time.sleep(STATUS_POLL_INTERVAL)
+                continue
+
+            polls += 1
+            full = polls % FULL_PUSH_EVERY == 0
+            changed = []
+            for result in results:
+                state = (result['status'], result['online'], result['app_running'])
+                if self._last_states.get(result['name']) != state:
+                    self._last_states[result['name']] = state
+                    changed.append(result)
+                elif full:
+                    changed.append(result)
+
+            if changed:
+                with self._sub_lock:
+                    subscribers = list(self._subscribers)
+                for q in subscribers:
+                    q.put(changed)
+            time.sleep(STATUS_POLL_INTERVAL)
+
+    def get_device_status(self, device: Dict) -> Dict:
+        """獲取設備狀態（整合時數追蹤，短時間內重複查詢直接回傳快取）"""
+        name = device['name']
+        with self._status_lock:
+            cached = self._status_cache.get(name)
+        if cached and time.monotonic() - cached[0] < STATUS_CACHE_TTL:
+            return cached[1]
+
+        running = online = False
+        with self._status_lock:
+            fails, next_probe = self._offline.get(name, (0, 0.0))
+        # 長時間離線的設備在退避期間不探測，直接沿用離線狀態
+        if fails < OFFLINE_BACKOFF_AFTER or time.monotonic() >= next_probe:
+            # 單次 SSH 執行同時判斷在線與程式狀態：能取得連線即視為在線
+            with self.pool.acquire(device, timeout=3) as client:
+                online = client is not None
+                if online:
+                    try:
+                        running = self._pgrep_once(client, self._device_ctx(device).pgrep_cmd, timeout=3)
+                    except Exception:
+                        running = False
+
+            if not online:
+                # 只有 SSH 連線本身失敗時才退回端口探測，區分「離線」與「在線但 SSH 異常」
+                online = self.check_online(device)
+
+            with self._status_lock:
+                if online:
+                    self._offline.pop(name, None)
+                else:
+                    fails += 1
+                    delay = 0.0
+                    if fails >= OFFLINE_BACKOFF_AFTER:
+                        delay = min(OFFLINE_BACKOFF_MAX, OFFLINE_BACKOFF_MIN * 2 ** (fails - OFFLINE_BACKOFF_AFTER))
+                    self._offline[name] = (fails, time.monotonic() + delay)
+
+        # 確定狀態
+        if running:
+            status = 'running'
+        elif online:
+            status = 'online'
+        else:
+            status = 'offline'
+
+        # 更新時數追蹤
+        self.time_tracker.update_status(device['name'], status)
+
+        # 獲取時數統計
+        stats = self.time_tracker.get_device_stats(device['name'])
+
+        result = {
+            'name': device['name'],
+            'ip': device['ip'],
+            'online': online,
+            'app_running': running,
+            'status': status,
+            'script': self._device_ctx(device).script_name,
+            'stats': stats  # 添加時數統計
+        }
+        with self._status_lock:
+            self._status_cache[name] = (time.monotonic(), result)
+        return result
+
+    def invalidate_status(self, device: Dict):
+        """清除設備狀態快取 (操作後讓下一次查詢立即反映新狀態)"""
+        with self._status_lock:
+            self._status_cache.pop(device['name'], None)
+            self._offline.pop(device['name'], None)
+        # 持有快照鎖：等進行中的輪詢寫回後再清除，避免過期的快照覆蓋本次失效
+        with self._snapshot_lock:
+            self._snapshot = (0.0, None)
+
+
+def register_monitor_routes(app: Flask, monitor: DeviceMonitor, template: str, index_etag: str):
+    """註冊兩個介面共用的路由：主頁面、設備狀態 (含 304)、SSE 推送與運行時間"""
+
+    @app.route('/')
+    def index():
+        """主頁面"""
+        total = len(monitor.devices)
+        etag = f"{index_etag}-{total}"
+        if etag in request.if_none_match:
+            return Response(status=304, headers={'ETag': f'"{etag}"'})
+        response = make_response(render_template(template, total=total))
+        response.set_etag(etag)
+        return response
+
+    @app.route('/api/devices')
+    def get_devices():
+        """獲取所有設備狀態（多線程優化；內容未變時回 304）"""
+        body = dumps_json(monitor.latest_statuses())
+        etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        # 讓瀏覽器在快照有效期間內合併重複請求
+        cache_control = f'private, max-age={int(STATUS_CACHE_TTL)}'
+        if etag in request.if_none_match:
+            return Response(status=304, headers={'ETag': f'"{etag}"', 'Cache-Control': cache_control})
+        response = json_response(body)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = cache_control
+        return response
+
+    @app.route('/api/devices/stream')
+    def stream_devices():
+        """以 Server-Sent Events 推送設備狀態變化 (訂閱數已滿時回 503)"""
+        q = monitor.subscribe()
+        if q is None:
+            return Response(status=503, headers={'Retry-After': '60'})
+
+        def generate():
+            try:
+                while True:
+                    try:
+                        changed = q.get(timeout=15)
+                    except queue.Empty:
+                        yield b": keepalive\n\n"  # 保持連線，避免代理逾時斷線
+                        continue
+                    yield b"data: " + dumps_json(changed) + b"\n\n"
+            finally:
+                monitor.unsubscribe(q)
+
+        response = Response(generate(), mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    @app.route('/api/uptime')
+    def get_uptime():
+        """獲取系統運行時間 (前端以 uptime_seconds 為基準自行每秒累加)"""
+        return ojson({
+            'uptime': monitor.time_tracker.get_uptime(),
+            'uptime_seconds': monitor.time_tracker.get_uptime_seconds(),
+            'start_time': monitor.time_tracker.get_start_time()
+        })